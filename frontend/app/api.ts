@@ -395,18 +395,45 @@ export const fetch_vectors = async (
 
   try {
     const host = await detectHost();
-    const response = await fetch(`${host}/api/get_vectors`, {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        uuid: uuid,
-        showAll: showAll,
-        credentials: credentials,
-      }),
-    });
-    const data: VectorsPayload | null = await response.json();
+    let data: VectorsPayload | null = null;
+    let cursor: string | null = null;
+
+    // The collection-wide view is paged, follow the cursor until the last page
+    do {
+      const response = await fetch(`${host}/api/get_vectors`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          uuid: uuid,
+          showAll: showAll,
+          credentials: credentials,
+          cursor: cursor,
+        }),
+      });
+      const page: VectorsPayload | null = await response.json();
+      if (!page || page.error !== "" || !page.vector_groups) {
+        return page;
+      }
+
+      if (!data) {
+        data = page;
+      } else {
+        for (const group of page.vector_groups.groups) {
+          const existing = data.vector_groups.groups.find(
+            (g) => g.name === group.name
+          );
+          if (existing) {
+            existing.chunks.push(...group.chunks);
+          } else {
+            data.vector_groups.groups.push(group);
+          }
+        }
+      }
+      cursor = page.vector_groups.cursor ?? null;
+    } while (cursor);
+
     return data;
   } catch (error) {
     console.error("Error retrieving content", error);
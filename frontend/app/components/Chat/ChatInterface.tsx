@@ -310,6 +310,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
         context: context,
         conversation: filteredMessages,
         rag_config: RAGConfig,
+        credentials: credentials,
       });
       socket.send(data);
     } else {
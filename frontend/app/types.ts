@@ -327,6 +327,7 @@ export type VectorsPayload = {
     embedder: string;
     groups: VectorGroup[];
     dimensions: number;
+    cursor?: string | null;
   };
 };
 
@@ -0,0 +1,477 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+import asyncio
+from array import array
+from collections import OrderedDict
+from contextlib import aclosing
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable
+
+from wasabi import msg
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SQLiteLRUCache:
+    """
+    Base of the persistent caches: one SQLite table whose entries are evicted least recently used first once they exceed max_bytes.
+    Subclasses name the table, its key columns and the SQL definitions of its key and value columns, size and last_used are added here.
+    """
+
+    table = ""
+    key_columns: tuple[str, ...] = ()
+    columns = ""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.columns},
+                size INTEGER NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY ({", ".join(self.key_columns)})
+            )"""
+        )
+        self.connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)"
+        )
+        self.connection.commit()
+        self.clock = self.connection.execute(
+            f"SELECT COALESCE(MAX(last_used), 0) FROM {self.table}"
+        ).fetchone()[0]
+        self.size = self._fetch_size()
+
+    def _fetch_size(self) -> int:
+        return self.connection.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()[0]
+
+    def _tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def _touch(self, keys: list[tuple]):
+        """Mark entries as recently used, called with the lock held"""
+        tick = self._tick()
+        where = " AND ".join(f"{column} = ?" for column in self.key_columns)
+        self.connection.executemany(
+            f"UPDATE {self.table} SET last_used = ? WHERE {where}",
+            [(tick, *key) for key in keys],
+        )
+        self.connection.commit()
+
+    def _insert(self, rows: list[tuple]):
+        """Insert or replace (*columns, size, last_used) rows and evict above max_bytes, called with the lock held"""
+        names = [column.split()[0] for column in self.columns.split(",")]
+        placeholders = ", ".join("?" * (len(names) + 2))
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(names)}, size, last_used) VALUES ({placeholders})",
+            rows,
+        )
+        self.connection.commit()
+        self.size = self._fetch_size()
+        self._evict()
+
+    def _evict(self):
+        keys = ", ".join(self.key_columns)
+        where = " AND ".join(f"{column} = ?" for column in self.key_columns)
+        while self.size > self.max_bytes:
+            rows = self.connection.execute(
+                f"SELECT {keys}, size FROM {self.table} ORDER BY last_used ASC LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            freed = 0
+            evicted = []
+            for *key, size in rows:
+                evicted.append(tuple(key))
+                freed += size
+                if self.size - freed <= self.max_bytes:
+                    break
+            self.connection.executemany(
+                f"DELETE FROM {self.table} WHERE {where}", evicted
+            )
+            self.connection.commit()
+            self.size -= freed
+            self.evictions += len(evicted)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size,
+            "max_size": self.max_bytes,
+        }
+
+
+class EmbeddingCache(SQLiteLRUCache):
+    """
+    Persistent, content-addressed cache of embeddings stored in SQLite.
+    Entries are keyed by (model, sha256 of the embedded text) and evicted least recently used first once the stored vectors exceed max_bytes.
+    """
+
+    table = "embeddings"
+    key_columns = ("model", "hash")
+    columns = "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL"
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """Return cached vectors for the given text hashes and mark them as recently used"""
+        found = {}
+        with self.lock:
+            unique = list(dict.fromkeys(hashes))
+            # Stay below SQLite's host parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for _hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[_hash] = vector.tolist()
+
+            if found:
+                self._touch([(model, _hash) for _hash in found])
+
+            self.hits += sum(1 for _hash in hashes if _hash in found)
+            self.misses += sum(1 for _hash in hashes if _hash not in found)
+        return found
+
+    def put_many(self, model: str, entries: dict[str, list[float]]):
+        """Store vectors by text hash and evict least recently used entries above max_bytes"""
+        if not entries:
+            return
+        with self.lock:
+            tick = self._tick()
+            rows = []
+            for _hash, vector in entries.items():
+                blob = array("f", vector).tobytes()
+                rows.append((model, _hash, blob, len(blob), tick))
+            self._insert(rows)
+
+    async def aget_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        return await asyncio.to_thread(self.get_many, model, hashes)
+
+    async def aput_many(self, model: str, entries: dict[str, list[float]]):
+        await asyncio.to_thread(self.put_many, model, entries)
+
+
+class FetchCache(SQLiteLRUCache):
+    """
+    Persistent cache of fetched web pages stored in SQLite, used for conditional requests.
+    Entries are keyed by URL and hold the ETag, Last-Modified, a hash and the compressed body of the page, least recently used entries are evicted once the bodies exceed max_bytes.
+    """
+
+    table = "pages"
+    key_columns = ("url",)
+    columns = (
+        "url TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+        "hash TEXT NOT NULL, body BLOB NOT NULL"
+    )
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    def get(self, url: str) -> dict | None:
+        """Return the cached entry of an URL with its decompressed body"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, hash, body FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touch([(url,)])
+            self.hits += 1
+        etag, last_modified, _hash, body = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "hash": _hash,
+            "body": zlib.decompress(body),
+        }
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> str:
+        """Store a fetched page and return the hash of its body"""
+        _hash = hashlib.sha256(body).hexdigest()
+        blob = zlib.compress(body)
+        with self.lock:
+            self._insert(
+                [(url, etag, last_modified, _hash, blob, len(blob), self._tick())]
+            )
+        return _hash
+
+    async def aget(self, url: str) -> dict | None:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(
+        self,
+        url: str,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> str:
+        return await asyncio.to_thread(self.put, url, body, etag, last_modified)
+
+
+class QueryCache:
+    """
+    In-memory LRU cache of query vectors with a time to live.
+    Entries are keyed by (embedder, model, normalized query).
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple, tuple[float, list[float]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return re.sub(r"\s+", " ", query).strip().casefold()
+
+    def key(self, embedder: str, model: str, query: str) -> tuple:
+        return (embedder, model, self.normalize(query))
+
+    def get(self, key: tuple) -> list[float] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, vector = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, key: tuple, vector: list[float]):
+        if self.max_size <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, vector)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests so they share one underlying call.
+    The call runs in its own task, callers that leave early don't cancel it for the others.
+    """
+
+    def __init__(self):
+        self.calls: dict[str, asyncio.Task] = {}
+        self.streams: dict[str, "SharedStream"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        """Await func, or the call already in flight for the same key"""
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.forget(self.calls, key, task))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def stream(
+        self, key: str, func: Callable[[], AsyncIterator]
+    ) -> AsyncIterator:
+        """Iterate func, or replay and follow the stream already in flight for the same key"""
+        while True:
+            stream = self.streams.get(key)
+            if stream is None or stream.done:
+                stream = SharedStream(func())
+                self.streams[key] = stream
+                stream.task.add_done_callback(
+                    lambda _, stream=stream: self.forget(self.streams, key, stream)
+                )
+            else:
+                self.coalesced += 1
+            started = False
+            try:
+                # Closed right away when the caller leaves, so the last one cancels the stream
+                async with aclosing(stream.subscribe()) as items:
+                    async for item in items:
+                        started = True
+                        yield item
+                return
+            except Exception:
+                # Followers of a stream cancelled before it reached them start over
+                if stream.cancelled and not started:
+                    continue
+                raise
+
+    @staticmethod
+    def forget(flights: dict, key: str, flight):
+        if flights.get(key) is flight:
+            del flights[key]
+        # Mark the result as retrieved in case every caller left before it finished
+        if isinstance(flight, asyncio.Task) and not flight.cancelled():
+            flight.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self.calls) + len(self.streams),
+            "coalesced": self.coalesced,
+        }
+
+
+class SharedStream:
+    """
+    Runs an async iterator once and lets several subscribers read every item it produced.
+    The iterator is cancelled when its last subscriber leaves.
+    """
+
+    def __init__(self, iterator: AsyncIterator):
+        self.items = []
+        self.error: Exception | None = None
+        self.done = False
+        # Set if the iterator was cancelled, its items are then incomplete
+        self.cancelled = False
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self.produce(iterator))
+
+    async def produce(self, iterator: AsyncIterator):
+        try:
+            async for item in iterator:
+                async with self.changed:
+                    self.items.append(item)
+                    self.changed.notify_all()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            await iterator.aclose()
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator:
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with self.changed:
+                    await self.changed.wait_for(
+                        lambda: position < len(self.items) or self.done
+                    )
+                    items = self.items[position:]
+                    finished = self.done
+                position += len(items)
+                for item in items:
+                    yield item
+                if finished and position >= len(self.items):
+                    break
+            if self.cancelled:
+                raise Exception("Shared stream was cancelled before it finished")
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Marked done right away so new callers don't follow the truncated stream
+                self.cancelled = True
+                self.done = True
+                self.task.cancel()
+
+
+def get_cache_dir() -> str:
+    """Directory of the persistent caches and downloaded models, VERBA_CACHE_DIR or ~/.cache/verba"""
+    return os.getenv(
+        "VERBA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "verba")
+    )
+
+
+def create_query_cache() -> QueryCache:
+    """Create the query vector cache from environment variables"""
+    return QueryCache(
+        max_size=int(os.getenv("VERBA_QUERY_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("VERBA_QUERY_CACHE_TTL", "3600")),
+    )
+
+
+def create_embedding_cache() -> EmbeddingCache | None:
+    """Create the embedding cache from environment variables, returns None if disabled"""
+    if os.getenv("VERBA_EMBEDDING_CACHE", "true").lower() in ("false", "0", "no"):
+        return None
+    max_mb = int(os.getenv("VERBA_EMBEDDING_CACHE_SIZE_MB", "512"))
+    try:
+        return EmbeddingCache(
+            os.path.join(get_cache_dir(), "embeddings.sqlite"),
+            max_bytes=max_mb * 1024 * 1024,
+        )
+    except Exception as e:
+        msg.warn(f"Embedding cache disabled: {str(e)}")
+        return None
+
+
+@lru_cache(maxsize=1)
+def create_fetch_cache() -> FetchCache | None:
+    """Create the web page fetch cache shared by all web readers from environment variables, returns None if disabled"""
+    if os.getenv("VERBA_FETCH_CACHE", "true").lower() in ("false", "0", "no"):
+        return None
+    max_mb = int(os.getenv("VERBA_FETCH_CACHE_SIZE_MB", "256"))
+    try:
+        return FetchCache(
+            os.path.join(get_cache_dir(), "pages.sqlite"),
+            max_bytes=max_mb * 1024 * 1024,
+        )
+    except Exception as e:
+        msg.warn(f"Fetch cache disabled: {str(e)}")
+        return None
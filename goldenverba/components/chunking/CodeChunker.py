@@ -21,6 +21,7 @@ class CodeChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "Code"
+        self.cpu_bound = True
         self.requires_library = ["langchain_text_splitters "]
         self.description = "Split code based on programming language using LangChain"
         self.config = {
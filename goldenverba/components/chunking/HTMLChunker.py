@@ -17,6 +17,7 @@ class HTMLChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "HTML"
+        self.cpu_bound = True
         self.requires_library = ["langchain_text_splitters "]
         self.description = "Split documents based on HTML tags using LangChain"
 
@@ -22,6 +22,7 @@ class JSONChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "JSON"
+        self.cpu_bound = True
         self.requires_library = ["langchain_text_splitters "]
         self.description = "Split json files using LangChain"
         self.config = {
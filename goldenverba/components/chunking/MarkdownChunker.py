@@ -17,6 +17,7 @@ class MarkdownChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "Markdown"
+        self.cpu_bound = True
         self.requires_library = ["langchain_text_splitters"]
         self.description = (
             "Split documents based on markdown formatting using LangChain"
@@ -18,6 +18,7 @@ class RecursiveChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "Recursive"
+        self.cpu_bound = True
         self.requires_library = ["langchain_text_splitters "]
         self.description = (
             "Recursively split documents based on predefined characters using LangChain"
@@ -1,10 +1,5 @@
-import contextlib
-
 from wasabi import msg
 
-with contextlib.suppress(Exception):
-    from sklearn.metrics.pairwise import cosine_similarity
-
 from goldenverba.components.chunk import Chunk
 from goldenverba.components.interfaces import Chunker
 from goldenverba.components.document import Document
@@ -13,6 +8,9 @@ from goldenverba.components.interfaces import Embedding
 
 import numpy as np
 
+# Sentences embedded and scanned for breakpoints at a time
+STREAM_BLOCK_SIZE = 2048
+
 
 class SemanticChunker(Chunker):
     """
@@ -22,7 +20,6 @@ class SemanticChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "Semantic"
-        self.requires_library = ["sklearn"]
         self.description = (
             "Split documents based on semantic similarity or max sentences"
         )
@@ -39,6 +36,12 @@ class SemanticChunker(Chunker):
                 description="Maximum number of sentences per chunk",
                 values=[],
             ),
+            "Reuse Sentence Embeddings": InputConfig(
+                type="bool",
+                value=False,
+                description="Derive chunk vectors from the sentence embeddings instead of embedding every chunk again",
+                values=[],
+            ),
         }
 
     async def chunk(
@@ -48,12 +51,15 @@ class SemanticChunker(Chunker):
         embedder: Embedding | None = None,
         embedder_config: dict | None = None,
     ) -> list[Document]:
-        
 
         breakpoint_percentile_threshold = int(
             config["Breakpoint Percentile Threshold"].value
         )
         max_sentences = int(config["Max Sentences Per Chunk"].value)
+        reuse_sentence_embeddings = (
+            "Reuse Sentence Embeddings" in config
+            and bool(config["Reuse Sentence Embeddings"].value)
+        )
 
         for document in documents:
 
@@ -61,135 +67,149 @@ class SemanticChunker(Chunker):
             if len(document.chunks) > 0:
                 continue
 
+            # Chunks are embedded with the document metadata as prefix, the sentence windows are not
+            reuse_embeddings = reuse_sentence_embeddings and not document.metadata
+
             # Use spaCy's sentence segmentation
-            sentences = [
-                {"sentence": sent.text, "index": i}
-                for i, sent in enumerate(document.spacy_doc.sents)
-            ]
-            sentences = self.combine_sentences(sentences)
+            sentences = [sent.text for sent in document.spacy_doc.sents]
 
             # If there's only one sentence, create a single chunk
             if len(sentences) == 1:
                 document.chunks.append(
                     Chunk(
-                        content=sentences[0]["sentence"],
+                        content=sentences[0],
                         chunk_id=0,
                         start_i=0,
                         end_i=len(document.content),
-                        content_without_overlap=sentences[0]["sentence"]
+                        content_without_overlap=sentences[0],
                     )
                 )
                 continue
 
             msg.info(f"Generated {len(sentences)} sentences")
 
-            embeddings = await embedder.vectorize(
-                embedder_config, [x["combined_sentence"] for x in sentences]
-            )
-
-            msg.info(f"Generated {len(embeddings)} embeddings")
-
-            for i, sentence in enumerate(sentences):
-                sentence["combined_sentence_embedding"] = embeddings[i]
-
-            distances, sentences = self.calculate_cosine_distances(sentences)
-
-            breakpoint_distance_threshold = np.percentile(
-                distances, breakpoint_percentile_threshold
-            )
-
-            chunks = []
-            current_chunk = []
-            char_is = []
-            sentence_count = 0
-            char_end_i = -1
-            for i, sentence in enumerate(sentences):
-                current_chunk.append(sentence["sentence"])
-                sentence_count += 1
+            combined_sentences = self.combine_sentences(sentences)
+            boundaries = []
+            vectors = []
+            chunk_start = 0
+            previous = None
+            # Embeddings of the sentences of the open chunk, starting at chunk_start
+            open_embeddings = None
+
+            # Embed and scan the document block by block so long documents never hold all embeddings at once
+            for block_start in range(0, len(sentences), STREAM_BLOCK_SIZE):
+                block_end = min(len(sentences), block_start + STREAM_BLOCK_SIZE)
+                embeddings = self.normalize(
+                    await embedder.vectorize(
+                        embedder_config, combined_sentences[block_start:block_end]
+                    )
+                )
 
-                # new chunk found (distance breakpoint not reached or reached max sentences)
-                if (
-                    i < len(distances) and distances[i] > breakpoint_distance_threshold
-                ) or sentence_count >= max_sentences:
-                    
-                    chunk_text = " ".join(current_chunk)
-                    chunks.append(chunk_text)
+                # Carry the last embedding over to compare across the block border
+                if previous is None:
+                    matrix, offset = embeddings, block_start
+                else:
+                    matrix = np.vstack([previous, embeddings])
+                    offset = block_start - 1
+                previous = embeddings[-1:]
+                if reuse_embeddings:
+                    rows = (
+                        embeddings
+                        if open_embeddings is None
+                        else np.vstack([open_embeddings, embeddings])
+                    )
+                    rows_start = chunk_start
 
-                    char_start_i = char_end_i + 1
-                    char_end_i = char_start_i + len(chunk_text)
-                    char_is.append((char_start_i, char_end_i))
+                distances = self.calculate_cosine_distances(matrix)
+                if len(distances) == 0:
+                    continue
+                breakpoint_distance_threshold = np.percentile(
+                    distances, breakpoint_percentile_threshold
+                )
 
-                    current_chunk = []
-                    sentence_count = 0
+                # new chunk found (distance breakpoint reached or reached max sentences)
+                for i, distance in enumerate(distances.tolist(), start=offset):
+                    if (
+                        distance > breakpoint_distance_threshold
+                        or i - chunk_start + 1 >= max_sentences
+                    ):
+                        boundaries.append((chunk_start, i + 1))
+                        if reuse_embeddings:
+                            vectors.append(
+                                self.pool(
+                                    rows[chunk_start - rows_start : i + 1 - rows_start],
+                                    combined_sentences[chunk_start : i + 1],
+                                )
+                            )
+                        chunk_start = i + 1
+
+                if reuse_embeddings:
+                    open_embeddings = rows[chunk_start - rows_start :]
 
             # Add any remaining sentences as the last chunk
-            if current_chunk:
-                chunk_text = " ".join(current_chunk)
-                chunks.append(chunk_text)
-                char_is.append((char_end_i + 1, char_end_i + 1 + len(chunk_text)))
+            if chunk_start < len(sentences):
+                boundaries.append((chunk_start, len(sentences)))
+                if reuse_embeddings:
+                    vectors.append(
+                        self.pool(open_embeddings, combined_sentences[chunk_start:])
+                    )
 
-            for i, chunk in enumerate(chunks):
+            char_end_i = -1
+            for i, (first, last) in enumerate(boundaries):
+                chunk_text = " ".join(sentences[first:last])
+                char_start_i = char_end_i + 1
+                char_end_i = char_start_i + len(chunk_text)
                 document.chunks.append(
                     Chunk(
-                        content=chunk,
+                        content=chunk_text,
                         chunk_id=i,
-                        start_i=char_is[i][0],
-                        end_i=char_is[i][1],
-                        content_without_overlap=chunk,
+                        start_i=char_start_i,
+                        end_i=char_end_i,
+                        content_without_overlap=chunk_text,
                     )
                 )
+                # Chunks with a vector are skipped by the EmbeddingManager
+                if reuse_embeddings:
+                    document.chunks[-1].vector = vectors[i]
 
         return documents
 
-    def combine_sentences(self, sentences, buffer_size=1):
-        # Go through each sentence dict
-        for i in range(len(sentences)):
-
-            # Create a string that will hold the sentences which are joined
-            combined_sentence = ""
-
-            # Add sentences before the current one, based on the buffer size.
-            for j in range(i - buffer_size, i):
-                # Check if the index j is not negative (to avoid index out of range like on the first one)
-                if j >= 0:
-                    # Add the sentence at index j to the combined_sentence string
-                    combined_sentence += sentences[j]["sentence"] + " "
-
-            # Add the current sentence
-            combined_sentence += sentences[i]["sentence"]
-
-            # Add sentences after the current one, based on the buffer size
-            for j in range(i + 1, i + 1 + buffer_size):
-                # Check if the index j is within the range of the sentences list
-                if j < len(sentences):
-                    # Add the sentence at index j to the combined_sentence string
-                    combined_sentence += " " + sentences[j]["sentence"]
-
-            # Then add the whole thing to your dict
-            # Store the combined sentence in the current sentence dict
-            sentences[i]["combined_sentence"] = combined_sentence
-
-        return sentences
-
-    def calculate_cosine_distances(self, sentences):
-        distances = []
-        for i in range(len(sentences) - 1):
-            embedding_current = sentences[i]["combined_sentence_embedding"]
-            embedding_next = sentences[i + 1]["combined_sentence_embedding"]
-
-            # Calculate cosine similarity
-            similarity = cosine_similarity([embedding_current], [embedding_next])[0][0]
-
-            # Convert to cosine distance
-            distance = 1 - similarity
-
-            # Append cosine distance to the list
-            distances.append(distance)
-
-            # Store distance in the dictionary
-            sentences[i]["distance_to_next"] = distance
-
-        # Optionally handle the last sentence
-        # sentences[-1]['distance_to_next'] = None  # or a default value
-
-        return distances, sentences
+    def combine_sentences(self, sentences: list[str], buffer_size=1) -> list[str]:
+        """Join every sentence with buffer_size neighbours on each side, sliced from one joined string"""
+        joined = " ".join(sentences)
+        starts = []
+        position = 0
+        for sentence in sentences:
+            starts.append(position)
+            position += len(sentence) + 1
+
+        last = len(sentences) - 1
+        return [
+            joined[
+                starts[max(0, i - buffer_size)] : starts[min(last, i + buffer_size)]
+                + len(sentences[min(last, i + buffer_size)])
+            ]
+            for i in range(len(sentences))
+        ]
+
+    @staticmethod
+    def normalize(embeddings: list[list[float]]) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    @staticmethod
+    def pool(embeddings: np.ndarray, windows: list[str]) -> list[float]:
+        """Average the embeddings of sentence windows weighted by the length of each window and renormalize"""
+        weights = np.asarray([max(1, len(window)) for window in windows])
+        vector = (embeddings * weights[:, None]).sum(axis=0)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        return vector.tolist()
+
+    @staticmethod
+    def calculate_cosine_distances(matrix: np.ndarray) -> np.ndarray:
+        """Cosine distance between every pair of adjacent rows of a normalized matrix"""
+        return 1 - np.einsum("ij,ij->i", matrix[:-1], matrix[1:])
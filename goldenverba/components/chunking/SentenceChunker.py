@@ -15,6 +15,7 @@ class SentenceChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "Sentence"
+        self.cpu_bound = True
         self.description = "Splits documents based on word tokens"
         self.config = {
             "Sentences": InputConfig(
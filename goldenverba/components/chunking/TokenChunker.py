@@ -15,6 +15,7 @@ class TokenChunker(Chunker):
     def __init__(self):
         super().__init__()
         self.name = "Token"
+        self.cpu_bound = True
         self.description = "Splits documents based on word tokens"
         self.config = {
             "Tokens": InputConfig(
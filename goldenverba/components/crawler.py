@@ -0,0 +1,178 @@
+import time
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from wasabi import msg
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {
+    "gclid",
+    "fbclid",
+    "msclkid",
+    "yclid",
+    "dclid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+    "_hsenc",
+    "_hsmi",
+    "ref_src",
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str | None:
+    """Canonical form of an URL used to deduplicate the crawl frontier
+    Lowercases scheme and host, drops default ports, fragments and tracking parameters and sorts the query.
+    @returns str - Normalized URL or None if it can't be crawled
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+class HostLimiter:
+    """
+    Politeness limits for one host: at most concurrency requests at once, started at least delay seconds apart.
+    """
+
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.delay = delay
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        if self.delay > 0:
+            async with self.lock:
+                wait = self.next_start - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.next_start = time.monotonic() + self.delay
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class Crawler:
+    """
+    Breadth-first crawler with a deduplicated frontier, a bounded worker pool and per host politeness limits.
+    Pages are yielded as soon as they are fetched, so they can be processed while the crawl continues.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int], Awaitable[tuple[Any, list[str]]]],
+        max_depth: int = 0,
+        concurrency: int = 8,
+        per_host: int = 4,
+        delay: float = 0.0,
+        max_pages: int | None = None,
+    ):
+        """
+        @parameter: fetch : Callable - Called with (url, depth), returns the page and the links to follow
+        @parameter: max_depth : int - Links are followed up to this many hops from the seeds
+        @parameter: concurrency : int - Number of pages fetched at once
+        @parameter: per_host : int - Number of pages fetched at once from the same host
+        @parameter: delay : float - Minimum seconds between requests to the same host
+        @parameter: max_pages : int - (Optional) Stop queueing new URLs after this many
+        """
+        self.fetch = fetch
+        self.max_depth = max_depth
+        self.concurrency = max(1, concurrency)
+        self.per_host = per_host
+        self.delay = delay
+        self.max_pages = max_pages
+        self.hosts: dict[str, HostLimiter] = {}
+        self.seen: set[str] = set()
+        self.failed = 0
+
+    def get_host_limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostLimiter(self.per_host, self.delay)
+        return self.hosts[host]
+
+    def add(
+        self, frontier: asyncio.Queue, url: str, depth: int, keep: bool = False
+    ):
+        """Queue an URL unless an equivalent one was seen, keep queues it as given instead of normalized"""
+        if depth > self.max_depth:
+            return
+        if self.max_pages is not None and len(self.seen) >= self.max_pages:
+            return
+        normalized = normalize_url(url)
+        if normalized is None or normalized in self.seen:
+            return
+        self.seen.add(normalized)
+        frontier.put_nowait((url if keep else normalized, depth))
+
+    async def crawl(self, seeds: list[str]) -> AsyncIterator[tuple[str, Any]]:
+        """Crawl from the seed URLs
+        @parameter: seeds : list[str] - URLs to start from at depth 0
+        @returns AsyncIterator[tuple[str, Any]] - (url, page) of every fetched page
+        """
+        frontier = asyncio.Queue()
+        # Bounded so the crawl pauses while the consumer is busy
+        pages = asyncio.Queue(maxsize=self.concurrency)
+        for seed in seeds:
+            self.add(frontier, seed, 0, keep=True)
+
+        async def worker():
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    async with self.get_host_limiter(url):
+                        page, links = await self.fetch(url, depth)
+                    if depth < self.max_depth:
+                        for link in links:
+                            self.add(frontier, link, depth + 1)
+                    await pages.put((url, page))
+                except Exception as e:
+                    self.failed += 1
+                    msg.warn(f"Failed to process URL {url}: {str(e)}")
+                finally:
+                    frontier.task_done()
+
+        async def finish():
+            await frontier.join()
+            await pages.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        done = asyncio.create_task(finish())
+        try:
+            while True:
+                entry = await pages.get()
+                if entry is None:
+                    break
+                yield entry
+        finally:
+            done.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(done, *workers, return_exceptions=True)
+        msg.info(
+            f"Crawled {len(self.seen) - self.failed} pages from {len(self.hosts)} hosts"
+        )
@@ -5,6 +5,36 @@ from spacy.language import Language
 import spacy
 import json
 
+MAX_BATCH_SIZE = 500000
+
+_nlp: Language | None = None
+
+
+def get_nlp() -> Language:
+    """Return the process-wide blank English pipeline with a sentencizer."""
+    global _nlp
+    if _nlp is None:
+        _nlp = spacy.blank("en")
+        _nlp.add_pipe("sentencizer", config={"punct_chars": None})
+    return _nlp
+
+
+def parse_content(content: str) -> Doc:
+    """Run the shared pipeline over content, batching very large texts."""
+    nlp = get_nlp()
+
+    if len(content) > MAX_BATCH_SIZE:
+        # Process content in batches
+        docs = [
+            nlp(content[i : i + MAX_BATCH_SIZE])
+            for i in range(0, len(content), MAX_BATCH_SIZE)
+        ]
+
+        # Merge all processed docs
+        return Doc.from_docs(docs)
+
+    return nlp(content)
+
 
 class Document:
     def __init__(
@@ -27,25 +57,18 @@ class Document:
         self.meta = meta
         self.metadata = metadata
         self.chunks: list[Chunk] = []
+        self._spacy_doc: Doc | None = None
 
-        MAX_BATCH_SIZE = 500000
-
-        nlp = spacy.blank("en")
-        nlp.add_pipe("sentencizer", config={"punct_chars": None})
-
-        if nlp and len(content) > MAX_BATCH_SIZE:
-            # Process content in batches
-            docs = []
-            for i in range(0, len(content), MAX_BATCH_SIZE):
-                batch = content[i : i + MAX_BATCH_SIZE]
-                docs.append(nlp(batch))
-
-            # Merge all processed docs
-            doc = Doc.from_docs(docs)
-        else:
-            doc = nlp(content) if nlp else None
+    @property
+    def spacy_doc(self) -> Doc:
+        """Sentencized spaCy Doc of the content, parsed on first access and cached."""
+        if self._spacy_doc is None:
+            self._spacy_doc = parse_content(self.content)
+        return self._spacy_doc
 
-        self.spacy_doc = doc
+    @spacy_doc.setter
+    def spacy_doc(self, doc: Doc | None):
+        self._spacy_doc = doc
 
     @staticmethod
     def to_json(document) -> dict:
@@ -1,11 +1,11 @@
 import os
 import requests
-import aiohttp
 import json
 
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment
+from goldenverba.components.ratelimit import check_response
 
 from wasabi import msg
 
@@ -19,6 +19,8 @@ class CohereEmbedder(Embedding):
         super().__init__()
         self.name = "Cohere"
         self.description = "Vectorizes documents and queries using Cohere"
+        # Cohere accepts up to 96 texts per request
+        self.max_batch_size = 96
         self.url = os.getenv("COHERE_BASE_URL", "https://api.cohere.com/v1")
         models = get_models(self.url, os.getenv("COHERE_API_KEY", None), "embed")
 
@@ -55,13 +57,13 @@ class CohereEmbedder(Embedding):
 
         all_embeddings = []
 
-        async with aiohttp.ClientSession() as session:
+        async with self.http_session() as session:
             for chunk in chunks(content, 96):
                 data = {"texts": chunk, "model": model, "input_type": "search_document"}
                 async with session.post(
                     self.url + "/embed", data=json.dumps(data), headers=headers
                 ) as response:
-                    response.raise_for_status()
+                    await check_response(response)
                     response_data = await response.json()
                     embeddings = response_data.get("embeddings", [])
                     all_embeddings.extend(embeddings)
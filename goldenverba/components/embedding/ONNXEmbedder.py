@@ -0,0 +1,205 @@
+import os
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from wasabi import msg
+
+from goldenverba.components.interfaces import Embedding
+from goldenverba.components.cache import get_cache_dir
+from goldenverba.components.types import InputConfig
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from transformers import AutoTokenizer
+except Exception as e:
+    pass
+
+
+class ONNXModel:
+    """
+    Sentence embedding model running on ONNX Runtime with int8 dynamic quantization.
+    """
+
+    def __init__(self, model_name: str, model_dir: str, threads: int):
+        self.model_name = model_name
+        onnx_path = os.path.join(model_dir, "model.onnx")
+        quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+
+        if not os.path.exists(quantized_path):
+            if not os.path.exists(onnx_path):
+                self.export(model_name, model_dir)
+            msg.info(f"Quantizing {model_name} to int8")
+            quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+
+        tokenizer_source = (
+            model_dir
+            if os.path.exists(os.path.join(model_dir, "tokenizer_config.json"))
+            else model_name
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_source)
+        self.pooling, self.max_length = self.load_sentence_config(model_name)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            quantized_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {_input.name for _input in self.session.get_inputs()}
+
+    @staticmethod
+    def export(model_name: str, model_dir: str):
+        """Export a HuggingFace model to ONNX, requires optimum"""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        msg.info(f"Exporting {model_name} to ONNX")
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+    def load_sentence_config(self, model_name: str) -> tuple[str, int]:
+        """Read pooling mode and max_seq_length from the sentence-transformers config of the model
+        @returns tuple[str, int] - "cls" or "mean" pooling and the maximum number of tokens
+        """
+        pooling = "mean"
+        max_length = self.tokenizer.model_max_length
+        try:
+            from huggingface_hub import hf_hub_download
+
+            with open(hf_hub_download(model_name, "1_Pooling/config.json")) as file:
+                if json.load(file).get("pooling_mode_cls_token"):
+                    pooling = "cls"
+            with open(
+                hf_hub_download(model_name, "sentence_bert_config.json")
+            ) as file:
+                max_length = json.load(file).get("max_seq_length", max_length)
+        except Exception as e:
+            msg.warn(
+                f"No sentence-transformers config for {model_name}, using {pooling} pooling: {str(e)}"
+            )
+        return pooling, min(max_length, self.tokenizer.model_max_length)
+
+    def encode(
+        self, content: list[str], batch_size: int, normalize: bool
+    ) -> list[list[float]]:
+        encoded = self.tokenizer(
+            content, truncation=True, max_length=self.max_length
+        )["input_ids"]
+        # Sort by length so every batch is padded to a similar length
+        order = sorted(range(len(content)), key=lambda i: len(encoded[i]))
+        embeddings = [None] * len(content)
+
+        for start in range(0, len(order), batch_size):
+            indices = order[start : start + batch_size]
+            batch = self.tokenizer.pad(
+                {"input_ids": [encoded[i] for i in indices]},
+                padding="longest",
+                return_tensors="np",
+            )
+            attention_mask = batch["attention_mask"].astype(np.int64)
+            inputs = {
+                "input_ids": batch["input_ids"].astype(np.int64),
+                "attention_mask": attention_mask,
+            }
+            if "token_type_ids" in self.input_names:
+                inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+
+            hidden = self.session.run(None, inputs)[0]
+
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                # Mean pooling over non padding tokens
+                mask = attention_mask[:, :, None].astype(hidden.dtype)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(
+                    mask.sum(axis=1), 1e-9, None
+                )
+            if normalize:
+                pooled = pooled / np.clip(
+                    np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None
+                )
+
+            for index, vector in zip(indices, pooled.tolist()):
+                embeddings[index] = vector
+
+        return embeddings
+
+
+class ONNXEmbedder(Embedding):
+    """
+    ONNXEmbedder for Verba, runs quantized sentence embedding models locally on CPU.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.name = "ONNX"
+        self.requires_library = ["onnxruntime", "transformers"]
+        self.description = "Embeds documents and queries locally on CPU using int8 quantized models on ONNX Runtime"
+        self.models: dict[str, ONNXModel] = {}
+        self.lock = threading.Lock()
+        self.threads = int(os.getenv("VERBA_ONNX_THREADS", str(os.cpu_count() or 1)))
+        self.model_dir = os.path.join(get_cache_dir(), "onnx")
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="onnx")
+        self.vector_settings = ["Model", "Normalize"]
+        self.config = {
+            "Model": InputConfig(
+                type="dropdown",
+                value="sentence-transformers/all-MiniLM-L6-v2",
+                description="Select an HuggingFace Embedding Model, exported to ONNX and quantized on first use",
+                values=[
+                    "sentence-transformers/all-MiniLM-L6-v2",
+                    "sentence-transformers/all-MiniLM-L12-v2",
+                    "sentence-transformers/all-mpnet-base-v2",
+                    "BAAI/bge-small-en-v1.5",
+                    "BAAI/bge-base-en-v1.5",
+                ],
+            ),
+            "Batch Size": InputConfig(
+                type="number",
+                value=32,
+                description="Number of texts per inference run",
+                values=[],
+            ),
+            "Normalize": InputConfig(
+                type="bool",
+                value=True,
+                description="Normalize embeddings to unit length",
+                values=[],
+            ),
+        }
+
+    def load(self, model_name: str) -> ONNXModel:
+        with self.lock:
+            if model_name not in self.models:
+                model_dir = os.path.join(self.model_dir, model_name.replace("/", "--"))
+                os.makedirs(model_dir, exist_ok=True)
+                self.models[model_name] = ONNXModel(
+                    model_name, model_dir, self.threads
+                )
+            return self.models[model_name]
+
+    def encode(
+        self, model_name: str, content: list[str], batch_size: int, normalize: bool
+    ) -> list[list[float]]:
+        return self.load(model_name).encode(content, batch_size, normalize)
+
+    async def vectorize(self, config: dict, content: list[str]) -> list[float]:
+        try:
+            model_name = config.get("Model").value
+            batch_size = int(config["Batch Size"].value) if "Batch Size" in config else 32
+            normalize = bool(config["Normalize"].value) if "Normalize" in config else True
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                self.encode,
+                model_name,
+                content,
+                max(1, batch_size),
+                normalize,
+            )
+        except Exception as e:
+            raise Exception(f"Failed to vectorize chunks: {str(e)}")
@@ -9,6 +9,7 @@ from wasabi import msg
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment
+from goldenverba.components.ratelimit import check_response, RetryableError
 
 
 class OpenAIEmbedder(Embedding):
@@ -18,6 +19,9 @@ class OpenAIEmbedder(Embedding):
         super().__init__()
         self.name = "OpenAI"
         self.description = "Vectorizes documents and queries using OpenAI"
+        # OpenAI accepts up to 2048 inputs and 300k tokens per request
+        self.max_batch_size = 2048
+        self.max_batch_tokens = 300000
 
         # Fetch available models
         api_key = os.getenv("OPENAI_API_KEY")
@@ -70,7 +74,7 @@ class OpenAIEmbedder(Embedding):
         payload_bytes = json.dumps(payload).encode("utf-8")
         payload_io = io.BytesIO(payload_bytes)
 
-        async with aiohttp.ClientSession() as session:
+        async with self.http_session() as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -78,7 +82,7 @@ class OpenAIEmbedder(Embedding):
                     data=payload_io,
                     timeout=30,
                 ) as response:
-                    response.raise_for_status()
+                    await check_response(response)
                     data = await response.json()
 
                     if "data" not in data:
@@ -92,9 +96,10 @@ class OpenAIEmbedder(Embedding):
 
                     return embeddings
 
-            except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
+            except RetryableError:
+                raise
+
+            except aiohttp.ClientResponseError as e:
                 raise Exception(f"API request failed: {str(e)}")
 
             except Exception as e:
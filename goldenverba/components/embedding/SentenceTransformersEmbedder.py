@@ -1,3 +1,10 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wasabi import msg
+
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
 
@@ -7,6 +14,50 @@ except Exception as e:
     pass
 
 
+class SentenceTransformerRegistry:
+    """
+    Keeps every SentenceTransformer model in memory after its first use.
+    Loading and encoding run on a dedicated executor so they never block the event loop.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.models: dict[str, "SentenceTransformer"] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="sentence-transformers"
+        )
+
+    def load(self, model_name: str) -> "SentenceTransformer":
+        with self.lock:
+            if model_name not in self.models:
+                msg.info(f"Loading SentenceTransformer model {model_name}")
+                self.models[model_name] = SentenceTransformer(model_name)
+            return self.models[model_name]
+
+    def encode(
+        self,
+        model_name: str,
+        content: list[str],
+        batch_size: int,
+        normalize: bool,
+        precision: str,
+    ) -> list[list[float]]:
+        model = self.load(model_name)
+        embeddings = model.encode(
+            content,
+            batch_size=batch_size,
+            normalize_embeddings=normalize,
+            convert_to_numpy=True,
+        )
+        if precision == "float16":
+            embeddings = embeddings.astype("float16")
+        return embeddings.tolist()
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+
 class SentenceTransformersEmbedder(Embedding):
     """
     SentenceTransformersEmbedder base class for Verba.
@@ -17,6 +68,15 @@ class SentenceTransformersEmbedder(Embedding):
         self.name = "SentenceTransformers"
         self.requires_library = ["sentence_transformers"]
         self.description = "Embeds and retrieves objects using SentenceTransformer"
+        self.registry = SentenceTransformerRegistry(
+            workers=int(os.getenv("VERBA_SENTENCE_TRANSFORMERS_WORKERS", "1"))
+        )
+        self.vector_settings = ["Model", "Normalize", "Precision"]
+        self.preload = [
+            model.strip()
+            for model in os.getenv("VERBA_SENTENCE_TRANSFORMERS_PRELOAD", "").split(",")
+            if model.strip()
+        ]
         self.config = {
             "Model": InputConfig(
                 type="dropdown",
@@ -31,13 +91,48 @@ class SentenceTransformersEmbedder(Embedding):
                     "paraphrase-MiniLM-L6-v2",
                 ],
             ),
+            "Batch Size": InputConfig(
+                type="number",
+                value=32,
+                description="Number of texts encoded at once by the model",
+                values=[],
+            ),
+            "Normalize": InputConfig(
+                type="bool",
+                value=False,
+                description="Normalize embeddings to unit length",
+                values=[],
+            ),
+            "Precision": InputConfig(
+                type="dropdown",
+                value="float32",
+                description="Precision of the returned embeddings",
+                values=["float32", "float16"],
+            ),
         }
 
+    async def warmup(self):
+        for model_name in self.preload:
+            try:
+                await self.registry.run(self.registry.load, model_name)
+            except Exception as e:
+                msg.warn(f"Couldn't preload {model_name}: {str(e)}")
+
     async def vectorize(self, config: dict, content: list[str]) -> list[float]:
         try:
             model_name = config.get("Model").value
-            model = SentenceTransformer(model_name)
-            embeddings = model.encode(content).tolist()
-            return embeddings
+            batch_size = int(config["Batch Size"].value) if "Batch Size" in config else 32
+            normalize = bool(config["Normalize"].value) if "Normalize" in config else False
+            precision = (
+                config["Precision"].value if "Precision" in config else "float32"
+            )
+            return await self.registry.run(
+                self.registry.encode,
+                model_name,
+                content,
+                max(1, batch_size),
+                normalize,
+                precision,
+            )
         except Exception as e:
             raise Exception(f"Failed to vectorize chunks: {str(e)}")
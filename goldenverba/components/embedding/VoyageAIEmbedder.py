@@ -9,6 +9,7 @@ from wasabi import msg
 from goldenverba.components.interfaces import Embedding
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment
+from goldenverba.components.ratelimit import check_response, RetryableError
 
 
 class VoyageAIEmbedder(Embedding):
@@ -18,6 +19,10 @@ class VoyageAIEmbedder(Embedding):
         super().__init__()
         self.name = "VoyageAI"
         self.description = "Vectorizes documents and queries using VoyageAI"
+        # VoyageAI accepts up to 128 inputs and 120k tokens per request for its smallest limit,
+        # counted with their own tokenizer so leave headroom for the cl100k_base estimate
+        self.max_batch_size = 128
+        self.max_batch_tokens = 100000
 
         # Fetch available models
         api_key = os.getenv("VOYAGE_API_KEY")
@@ -66,7 +71,7 @@ class VoyageAIEmbedder(Embedding):
         }
         payload = {"input": content, "model": model}
 
-        async with aiohttp.ClientSession() as session:
+        async with self.http_session() as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -77,7 +82,7 @@ class VoyageAIEmbedder(Embedding):
                     if response.status == 400:
                         error_body = await response.text()
                         raise ValueError(f"Bad Request: {error_body}")
-                    response.raise_for_status()
+                    await check_response(response)
                     data = await response.json()
 
                     if "data" not in data:
@@ -91,9 +96,10 @@ class VoyageAIEmbedder(Embedding):
 
                     return embeddings
 
-            except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
+            except RetryableError:
+                raise
+
+            except aiohttp.ClientResponseError as e:
                 raise Exception(f"API request failed: {str(e)}")
 
             except Exception as e:
@@ -1,6 +1,5 @@
 import os
 import json
-import aiohttp
 from typing import List, Dict, AsyncGenerator
 
 from goldenverba.components.interfaces import Generator
@@ -74,7 +73,7 @@ class CohereGenerator(Generator):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self.http_session() as session:
                 async with session.post(
                     self.url + "/chat", json=data, headers=headers
                 ) as response:
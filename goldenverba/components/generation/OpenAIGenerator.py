@@ -3,7 +3,6 @@ from dotenv import load_dotenv
 from goldenverba.components.interfaces import Generator
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment
-import httpx
 import json
 
 load_dotenv()
@@ -72,7 +71,7 @@ class OpenAIGenerator(Generator):
             "stream": True,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with self.http_client() as client:
             async with client.stream(
                 "POST",
                 f"{openai_url}/chat/completions",
@@ -2,6 +2,12 @@ from goldenverba.components.document import Document
 from goldenverba.server.types import FileConfig
 from goldenverba.components.types import InputConfig
 
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator
+
+import aiohttp
+import httpx
 from dotenv import load_dotenv
 
 from wasabi import msg
@@ -10,6 +16,18 @@ from weaviate import Client
 load_dotenv()
 
 
+@lru_cache(maxsize=1)
+def get_token_encoding():
+    """Load the tiktoken encoding used to budget embedding requests, None if unavailable"""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        msg.warn(f"Couldn't load tiktoken encoding, estimating tokens instead: {str(e)}")
+        return None
+
+
 class VerbaComponent:
     """
     Base Class for Verba Readers, Chunkers, Embedders, Retrievers, and Generators.
@@ -22,6 +40,7 @@ class VerbaComponent:
         self.description = ""
         self.config = {}
         self.type = ""
+        self.http_pool = None
 
     def get_meta(self, envs, libs) -> dict:
 
@@ -40,6 +59,24 @@ class VerbaComponent:
             "available": self.check_available(envs, libs),
         }
 
+    @asynccontextmanager
+    async def http_session(self):
+        """Yield the shared aiohttp session, or a short-lived one if no HTTPSessionPool is attached"""
+        if self.http_pool is not None:
+            yield self.http_pool.get_session()
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+
+    @asynccontextmanager
+    async def http_client(self):
+        """Yield the shared httpx client, or a short-lived one if no HTTPSessionPool is attached"""
+        if self.http_pool is not None:
+            yield self.http_pool.get_client()
+        else:
+            async with httpx.AsyncClient() as client:
+                yield client
+
     def check_available(self, envs, libs) -> bool:
         if self.requires_env:
             for _env in self.requires_env:
@@ -69,6 +106,16 @@ class Reader(VerbaComponent):
         """
         raise NotImplementedError("load method must be implemented by a subclass.")
 
+    async def stream(
+        self, config: dict, fileConfig: FileConfig
+    ) -> AsyncIterator[Document]:
+        """Yield Verba Documents as soon as they are loaded, readers producing many documents can override this
+        @parameter: fileConfig: FileConfig - FileConfiguration sent by the frontend
+        @returns AsyncIterator[Document] - Verba documents
+        """
+        for document in await self.load(config, fileConfig):
+            yield document
+
 
 class Embedding(VerbaComponent):
     """
@@ -78,6 +125,27 @@ class Embedding(VerbaComponent):
     def __init__(self):
         super().__init__()
         self.max_batch_size = 128
+        # Token limit of a single request, None if the provider only limits the number of texts
+        self.max_batch_tokens = None
+        # Config settings that change the returned vectors, cached vectors are keyed by them
+        self.vector_settings = ["Model"]
+
+    def count_tokens(self, content: list[str]) -> list[int]:
+        """Count the tokens of every text to pack requests up to max_batch_tokens
+        @parameter: content : list[str] - List of strings to embed
+        @return: list[int] - Tokens per string
+        """
+        encoding = get_token_encoding()
+        if encoding is None:
+            return [len(text) // 4 + 1 for text in content]
+        return [
+            len(tokens)
+            for tokens in encoding.encode_batch(content, disallowed_special=())
+        ]
+
+    async def warmup(self):
+        """Load local models ahead of the first request, called once at startup"""
+        pass
 
     async def vectorize(self, config: dict, content: list[str]) -> list[float]:
         """Embed verba documents and its chunks to Weaviate
@@ -96,6 +164,8 @@ class Chunker(VerbaComponent):
     def __init__(self):
         super().__init__()
         self.config = {}
+        # Pure CPU chunkers that don't need an embedder can run in worker processes
+        self.cpu_bound = False
 
     async def chunk(
         self,
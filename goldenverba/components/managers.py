@@ -7,18 +7,32 @@ from weaviate.classes.query import Filter, Sort, MetadataQuery
 from weaviate.collections.classes.data import DataObject
 from weaviate.classes.aggregate import GroupByAggregate
 from weaviate.classes.init import AdditionalConfig, Timeout
+from weaviate.classes.config import Property, DataType
+from weaviate.util import generate_uuid5
 
 import os
+import time
 import asyncio
 import json
 import re
+import multiprocessing
 from urllib.parse import urlparse
 from datetime import datetime
-
-from sklearn.decomposition import PCA
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator
 
 
 from goldenverba.components.document import Document
+from goldenverba.components.chunk import Chunk
+from goldenverba.components.cache import (
+    create_embedding_cache,
+    create_query_cache,
+    QueryCache,
+    hash_text,
+)
+from goldenverba.components.ratelimit import AdaptiveBatchController
+from goldenverba.components.projection import Projection
 from goldenverba.components.interfaces import (
     Reader,
     Chunker,
@@ -56,6 +70,7 @@ from goldenverba.components.embedding.VoyageAIEmbedder import VoyageAIEmbedder
 from goldenverba.components.embedding.SentenceTransformersEmbedder import (
     SentenceTransformersEmbedder,
 )
+from goldenverba.components.embedding.ONNXEmbedder import ONNXEmbedder
 
 # Import Retrievers
 from goldenverba.components.retriever.WindowRetriever import WindowRetriever
@@ -96,6 +111,7 @@ if production != "Production":
     embedders = [
         OllamaEmbedder(),
         SentenceTransformersEmbedder(),
+        ONNXEmbedder(),
         WeaviateEmbedder(),
         VoyageAIEmbedder(),
         CohereEmbedder(),
@@ -150,6 +166,47 @@ class WeaviateManager:
         self.config_collection_name = "VERBA_CONFIG"
         self.suggestion_collection_name = "VERBA_SUGGESTION"
         self.embedding_table = {}
+        self.cache_table = {}
+        # Collections known to exist per client, see verify_collection
+        self.collection_registry: dict[WeaviateAsyncClient, set[str]] = {}
+        # Chunk properties compared when updating a document incrementally
+        self.chunk_diff_properties = [
+            "chunk_id",
+            "title",
+            "labels",
+            "start_i",
+            "end_i",
+            "content_without_overlap",
+        ]
+        # Maximum number of vectors streamed to fit a projection
+        self.projection_sample_size = int(
+            os.getenv("VERBA_PROJECTION_SAMPLE_SIZE", "20000")
+        )
+        # Number of chunks a collection needs before its projection is fitted and frozen
+        self.projection_warmup = max(
+            Projection.n_components,
+            int(os.getenv("VERBA_PROJECTION_WARMUP", "1000")),
+        )
+        self.projection_locks: dict[str, asyncio.Lock] = {}
+        # Frozen projections per client and embedding collection, see get_projection
+        self.projection_registry: dict[WeaviateAsyncClient, dict[str, Projection]] = {}
+        # Semantic cache of retrieved context and generated answers, see Cache Logic
+        self.semantic_cache_enabled = os.getenv(
+            "VERBA_SEMANTIC_CACHE", "false"
+        ).lower() in ("true", "1", "yes")
+        self.semantic_cache_distance = float(
+            os.getenv("VERBA_SEMANTIC_CACHE_DISTANCE", "0.05")
+        )
+        self.semantic_cache_ttl = float(os.getenv("VERBA_SEMANTIC_CACHE_TTL", "86400"))
+        self.semantic_cache_expired_at: dict[str, float] = {}
+        # Number of UUIDs per filter in bulk lookups and deletes
+        self.delete_batch_size = int(os.getenv("VERBA_DELETE_BATCH_SIZE", "500"))
+        # Number of bulk deletes or title lookups running at once
+        self.delete_concurrency = int(os.getenv("VERBA_DELETE_CONCURRENCY", "4"))
+        # Documents imported before UUIDs were derived from titles are only found by title
+        self.legacy_document_lookup = os.getenv(
+            "VERBA_LEGACY_DOCUMENT_LOOKUP", "true"
+        ).lower() not in ("false", "0", "no")
 
     ### Connection Handling
 
@@ -245,6 +302,7 @@ class WeaviateManager:
             )
 
     async def disconnect(self, client: WeaviateAsyncClient):
+        self.forget_collections(client)
         try:
             await client.close()
             return True
@@ -287,31 +345,73 @@ class WeaviateManager:
 
     ### Collection Handling
 
+    async def load_collection_registry(self, client: WeaviateAsyncClient):
+        """Learn which collections exist so later verify calls don't hit Weaviate"""
+        collections = await client.collections.list_all(simple=True)
+        self.collection_registry[client] = set(collections.keys())
+
+    def forget_collections(
+        self, client: WeaviateAsyncClient, collection_names: list[str] | None = None
+    ):
+        """Invalidate registry entries after collections were deleted"""
+        if collection_names is None or self.config_collection_name in collection_names:
+            self.projection_registry.pop(client, None)
+        elif client in self.projection_registry:
+            for collection_name in collection_names:
+                self.projection_registry[client].pop(collection_name, None)
+        if collection_names is None:
+            self.collection_registry.pop(client, None)
+        elif client in self.collection_registry:
+            self.collection_registry[client].difference_update(collection_names)
+
     async def verify_collection(
-        self, client: WeaviateAsyncClient, collection_name: str
+        self,
+        client: WeaviateAsyncClient,
+        collection_name: str,
+        properties: list[Property] | None = None,
     ):
+        """Create a collection if it doesn't exist
+        @parameter: properties : list[Property] - (Optional) Properties declared up front, the others are added by auto-schema on insert
+        """
+        known_collections = self.collection_registry.setdefault(client, set())
+        if collection_name in known_collections:
+            return True
         if not await client.collections.exists(collection_name):
             msg.info(
                 f"Collection: {collection_name} does not exist, creating new collection."
             )
-            await client.collections.create(name=collection_name)
+            await client.collections.create(
+                name=collection_name, properties=properties
+            )
+        known_collections.add(collection_name)
         return True
 
-    async def verify_embedding_collection(self, client: WeaviateAsyncClient, embedder):
+    def get_embedding_collection_name(self, embedder: str) -> str:
         if embedder not in self.embedding_table:
             self.embedding_table[embedder] = "VERBA_Embedding_" + re.sub(
                 r"[^a-zA-Z0-9]", "_", embedder
             )
-            await self.verify_collection(client, self.embedding_table[embedder])
-        return True
+        return self.embedding_table[embedder]
 
-    async def verify_cache_collection(self, client: WeaviateAsyncClient, embedder):
-        if embedder not in self.embedding_table:
-            self.embedding_table[embedder] = "VERBA_Cache_" + re.sub(
+    def get_cache_collection_name(self, embedder: str) -> str:
+        if embedder not in self.cache_table:
+            self.cache_table[embedder] = "VERBA_Cache_" + re.sub(
                 r"[^a-zA-Z0-9]", "_", embedder
             )
-            await self.verify_collection(client, self.embedding_table[embedder])
-        return True
+        return self.cache_table[embedder]
+
+    async def verify_embedding_collection(self, client: WeaviateAsyncClient, embedder):
+        # Chunks stored while the projection warms up have no pca, auto-schema wouldn't create it
+        return await self.verify_collection(
+            client,
+            self.get_embedding_collection_name(embedder),
+            properties=[Property(name="pca", data_type=DataType.NUMBER_ARRAY)],
+        )
+
+    async def verify_cache_collection(self, client: WeaviateAsyncClient, embedder):
+        return await self.verify_collection(
+            client, self.get_cache_collection_name(embedder)
+        )
 
     async def verify_embedding_collections(
         self, client: WeaviateAsyncClient, environment_variables, libraries
@@ -320,16 +420,12 @@ class WeaviateManager:
             if embedder.check_available(environment_variables, libraries):
                 if "Model" in embedder.config:
                     for _embedder in embedder.config["Model"].values:
-                        self.embedding_table[_embedder] = "VERBA_Embedding_" + re.sub(
-                            r"[^a-zA-Z0-9]", "_", _embedder
-                        )
-                        await self.verify_collection(
-                            client, self.embedding_table[_embedder]
-                        )
+                        await self.verify_embedding_collection(client, _embedder)
 
     async def verify_collections(
         self, client: WeaviateAsyncClient, environment_variables, libraries
     ):
+        await self.load_collection_registry(client)
         await self.verify_collection(client, self.document_collection_name)
         await self.verify_collection(client, self.suggestion_collection_name)
         await self.verify_collection(client, self.config_collection_name)
@@ -381,7 +477,9 @@ class WeaviateManager:
 
             ### Import Document
             document_obj = Document.to_json(document)
-            doc_uuid = await document_collection.data.insert(document_obj)
+            doc_uuid = await document_collection.data.insert(
+                document_obj, uuid=self.get_document_uuid(document.title)
+            )
 
             chunk_ids = []
 
@@ -424,63 +522,395 @@ class WeaviateManager:
                     await self.delete_document(client, doc_uuid)
                 raise Exception(f"Chunk import failed with : {str(e)}")
 
+    async def update_document(
+        self,
+        client: WeaviateAsyncClient,
+        uuid: str,
+        document: Document,
+        embedder: str,
+        stored_chunks: list,
+    ):
+        """Apply the difference between the stored chunks of a document and its new chunks.
+        Unchanged chunks (same content) are kept and only re-numbered if needed, new chunks are inserted and stale ones deleted.
+        """
+        if await self.verify_collection(
+            client, self.document_collection_name
+        ) and await self.verify_embedding_collection(client, embedder):
+            document_collection = client.collections.get(self.document_collection_name)
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+
+            previous_document = await document_collection.query.fetch_object_by_id(
+                uuid
+            )
+
+            stored_by_content = {}
+            for obj in stored_chunks:
+                stored_by_content.setdefault(obj.properties["content"], []).append(obj)
+
+            new_objects = []
+            updates = []
+            for chunk in document.chunks:
+                chunk.doc_uuid = uuid
+                chunk.labels = document.labels
+                chunk.title = document.title
+                properties = chunk.to_json()
+
+                matches = stored_by_content.get(chunk.content)
+                if matches:
+                    obj = matches.pop(0)
+                    changed = {
+                        key: properties[key]
+                        for key in self.chunk_diff_properties
+                        if obj.properties.get(key) != properties[key]
+                    }
+                    # Kept chunks pick up coordinates once the projection is frozen
+                    stored_pca = obj.properties.get("pca")
+                    new_pca = properties["pca"]
+                    if new_pca is not None and new_pca != stored_pca:
+                        changed["pca"] = new_pca
+                    if changed:
+                        updates.append((obj, changed))
+                else:
+                    new_objects.append(
+                        DataObject(properties=properties, vector=chunk.vector)
+                    )
+
+            removed = [obj for objs in stored_by_content.values() for obj in objs]
+
+            msg.info(
+                f"Updating {document.title}: {len(new_objects)} new, {len(updates)} changed, {len(removed)} removed chunks"
+            )
+
+            # New chunks are added before anything is changed or removed, so a failure can be rolled back
+            inserted = []
+            applied = []
+            deleting = False
+            try:
+                if new_objects:
+                    chunk_response = await embedder_collection.data.insert_many(
+                        new_objects
+                    )
+                    inserted = list(chunk_response.uuids.values())
+                    if chunk_response.has_errors:
+                        raise Exception(
+                            f"Failed to ingest chunks into Weaviate: {chunk_response.errors}"
+                        )
+
+                for obj, changed in updates:
+                    await embedder_collection.data.update(
+                        uuid=obj.uuid, properties=changed
+                    )
+                    applied.append((obj, changed))
+
+                await document_collection.data.replace(
+                    uuid=uuid, properties=Document.to_json(document)
+                )
+
+                response = await embedder_collection.aggregate.over_all(
+                    filters=Filter.by_property("doc_uuid").equal(uuid),
+                    total_count=True,
+                )
+                if response.total_count != len(document.chunks) + len(removed):
+                    raise Exception(
+                        f"Chunk Mismatch detected after updating: Imported:{response.total_count - len(removed)} | Existing: {len(document.chunks)}"
+                    )
+
+                if removed:
+                    deleting = True
+                    await embedder_collection.data.delete_many(
+                        where=Filter.by_id().contains_any(
+                            [obj.uuid for obj in removed]
+                        )
+                    )
+            except Exception as e:
+                await self.rollback_update(
+                    embedder_collection,
+                    document_collection,
+                    previous_document,
+                    inserted,
+                    applied,
+                    removed if deleting else [],
+                )
+                raise Exception(f"Chunk update failed with : {str(e)}")
+
+    async def rollback_update(
+        self,
+        embedder_collection,
+        document_collection,
+        previous_document,
+        inserted: list,
+        applied: list,
+        removed: list,
+    ):
+        """Restore a document and its chunks to the state before a failed update_document"""
+        try:
+            if inserted:
+                await embedder_collection.data.delete_many(
+                    where=Filter.by_id().contains_any(inserted)
+                )
+            for obj, changed in applied:
+                await embedder_collection.data.update(
+                    uuid=obj.uuid,
+                    properties={key: obj.properties.get(key) for key in changed},
+                )
+            if removed:
+                # Removed chunks might be partially deleted, recreate all of them
+                await embedder_collection.data.delete_many(
+                    where=Filter.by_id().contains_any([obj.uuid for obj in removed])
+                )
+                await embedder_collection.data.insert_many(
+                    [
+                        DataObject(
+                            properties=obj.properties,
+                            uuid=obj.uuid,
+                            vector=(
+                                obj.vector.get("default")
+                                if isinstance(obj.vector, dict)
+                                else obj.vector
+                            ),
+                        )
+                        for obj in removed
+                    ]
+                )
+            await document_collection.data.replace(
+                uuid=previous_document.uuid, properties=previous_document.properties
+            )
+        except Exception as e:
+            msg.fail(f"Rolling back the update of {previous_document.uuid} failed: {str(e)}")
+
     ### Document CRUD
 
+    def get_document_uuid(self, title: str) -> str:
+        """Documents are stored under a UUID derived from their title"""
+        return generate_uuid5(title, self.document_collection_name)
+
     async def exist_document_name(self, client: WeaviateAsyncClient, name: str) -> str:
         if await self.verify_collection(client, self.document_collection_name):
             document_collection = client.collections.get(self.document_collection_name)
-            aggregation = await document_collection.aggregate.over_all(total_count=True)
+            uuid = self.get_document_uuid(name)
+            if await document_collection.data.exists(uuid):
+                return uuid
+            if self.legacy_document_lookup:
+                return (await self.find_legacy_documents(client, [name])).get(name)
+            return None
 
-            if aggregation.total_count == 0:
-                return None
-            else:
-                documents = await document_collection.query.fetch_objects(
-                    filters=Filter.by_property("title").equal(name)
-                )
-                if len(documents.objects) > 0:
-                    return documents.objects[0].uuid
+    async def exist_document_names(
+        self, client: WeaviateAsyncClient, names: list[str]
+    ) -> dict[str, str]:
+        """Resolve many titles at once
+        @parameter: names : list[str] - Titles of the documents to look up
+        @returns dict[str, str] - UUIDs of the stored documents by title, missing titles are left out
+        """
+        found = {}
+        names = list(dict.fromkeys(names))
+        if not names or not await self.verify_collection(
+            client, self.document_collection_name
+        ):
+            return found
+        document_collection = client.collections.get(self.document_collection_name)
+
+        uuids = {self.get_document_uuid(name): name for name in names}
+        batches = list(uuids.keys())
+        for i in range(0, len(batches), self.delete_batch_size):
+            batch = batches[i : i + self.delete_batch_size]
+            response = await document_collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(batch),
+                limit=len(batch),
+                return_properties=[],
+            )
+            for document in response.objects:
+                uuid = str(document.uuid)
+                found[uuids[uuid]] = uuid
+
+        if self.legacy_document_lookup:
+            missing = [name for name in names if name not in found]
+            found.update(await self.find_legacy_documents(client, missing))
+        return found
+
+    async def find_legacy_documents(
+        self, client: WeaviateAsyncClient, names: list[str], page_size: int = 100
+    ) -> dict[str, str]:
+        """Look up documents with random UUIDs by their exact title, one query per title
+        @parameter: page_size : int - Candidates fetched per request, titles are tokenized so the filter also matches titles containing the same words
+        """
+        document_collection = client.collections.get(self.document_collection_name)
+        semaphore = asyncio.Semaphore(max(1, self.delete_concurrency))
+
+        async def find(name: str) -> str | None:
+            offset = 0
+            while True:
+                async with semaphore:
+                    response = await document_collection.query.fetch_objects(
+                        filters=Filter.by_property("title").equal(name),
+                        limit=page_size,
+                        offset=offset,
+                        return_properties=["title"],
+                    )
+                for document in response.objects:
+                    if document.properties.get("title") == name:
+                        return str(document.uuid)
+                if len(response.objects) < page_size:
+                    return None
+                offset += page_size
 
-            return None
+        uuids = await asyncio.gather(*[find(name) for name in names])
+        return {name: uuid for name, uuid in zip(names, uuids) if uuid is not None}
 
     async def delete_document(self, client: WeaviateAsyncClient, uuid: str):
-        if await self.verify_collection(client, self.document_collection_name):
-            document_collection = client.collections.get(self.document_collection_name)
+        await self.delete_documents(client, [uuid])
 
-            if not await document_collection.data.exists(uuid):
-                return
-
-            document_obj = await document_collection.query.fetch_object_by_id(uuid)
-            embedding_config = json.loads(document_obj.properties.get("meta"))[
-                "Embedder"
-            ]
-            embedder = embedding_config["config"]["Model"]["value"]
+    async def delete_documents(
+        self, client: WeaviateAsyncClient, uuids: list[str]
+    ) -> int:
+        """Delete documents and their chunks with filtered bulk deletes, grouped per embedding collection
+        @parameter: uuids : list[str] - Documents to delete, unknown UUIDs are ignored
+        @returns int - Number of deleted documents
+        """
+        if not uuids or not await self.verify_collection(
+            client, self.document_collection_name
+        ):
+            return 0
+        document_collection = client.collections.get(self.document_collection_name)
+
+        batches = [
+            uuids[i : i + self.delete_batch_size]
+            for i in range(0, len(uuids), self.delete_batch_size)
+        ]
+        # Look up the embedder of every document to find its chunks
+        grouped: dict[str, list[str]] = {}
+        for batch in batches:
+            response = await document_collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(batch),
+                limit=len(batch),
+                return_properties=["meta"],
+            )
+            for document in response.objects:
+                embedder = json.loads(document.properties.get("meta"))["Embedder"][
+                    "config"
+                ]["Model"]["value"]
+                grouped.setdefault(embedder, []).append(str(document.uuid))
+
+        total = sum(len(group) for group in grouped.values())
+        deleted = 0
+        semaphore = asyncio.Semaphore(max(1, self.delete_concurrency))
+
+        async def delete_batch(embedder: str, batch: list[str]):
+            nonlocal deleted
+            async with semaphore:
+                embedder_collection = client.collections.get(
+                    self.get_embedding_collection_name(embedder)
+                )
+                # Deletes are capped server side, repeat until no chunk matches
+                while True:
+                    result = await embedder_collection.data.delete_many(
+                        where=Filter.by_property("doc_uuid").contains_any(batch)
+                    )
+                    if result.matches == 0 or result.successful == 0:
+                        break
+                await document_collection.data.delete_many(
+                    where=Filter.by_id().contains_any(batch)
+                )
+            deleted += len(batch)
+            msg.info(f"Deleted {deleted}/{total} documents")
 
+        tasks = []
+        for embedder, group in grouped.items():
             if await self.verify_embedding_collection(client, embedder):
-                if await document_collection.data.delete_by_id(uuid):
-                    embedder_collection = client.collections.get(
-                        self.embedding_table[embedder]
+                for i in range(0, len(group), self.delete_batch_size):
+                    tasks.append(
+                        delete_batch(embedder, group[i : i + self.delete_batch_size])
                     )
-                    await embedder_collection.data.delete_many(
-                        where=Filter.by_property("doc_uuid").equal(uuid)
+        await asyncio.gather(*tasks)
+
+        for embedder in grouped:
+            await self.invalidate_semantic_cache(client, embedder)
+        return deleted
+
+    async def get_document_chunks(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        doc_uuid: str,
+        include_vector: bool = False,
+        return_properties: list[str] | None = None,
+    ) -> list:
+        """Fetch every chunk of a document in chunk_id order
+        @parameter: return_properties : list[str] - (Optional) Properties to fetch besides chunk_id, all if not set
+        """
+        if return_properties is not None and "chunk_id" not in return_properties:
+            return_properties = ["chunk_id", *return_properties]
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            batch_size = 250
+            last_chunk_id = None
+            objects = []
+            # Page by chunk_id, offsets stop working past QUERY_MAXIMUM_RESULTS and cursors don't support filters
+            while True:
+                filters = Filter.by_property("doc_uuid").equal(doc_uuid)
+                if last_chunk_id is not None:
+                    filters = filters & Filter.by_property("chunk_id").greater_than(
+                        last_chunk_id
                     )
+                weaviate_chunks = await embedder_collection.query.fetch_objects(
+                    filters=filters,
+                    limit=batch_size,
+                    sort=Sort.by_property("chunk_id", ascending=True),
+                    return_properties=return_properties,
+                    include_vector=include_vector,
+                )
+                objects.extend(weaviate_chunks.objects)
+                if len(weaviate_chunks.objects) < batch_size:
+                    break
+                last_chunk_id = weaviate_chunks.objects[-1].properties["chunk_id"]
+            return objects
 
     async def delete_all_documents(self, client: WeaviateAsyncClient):
-        if await self.verify_collection(client, self.document_collection_name):
-            document_collection = client.collections.get(self.document_collection_name)
-            async for item in document_collection.iterator():
-                await self.delete_document(client, item.uuid)
+        """Drop the document collection and every embedding and cache collection, they are recreated on demand"""
+        collections = await client.collections.list_all(simple=True)
+        collection_names = [
+            name
+            for name in collections.keys()
+            if name == self.document_collection_name
+            or name.startswith("VERBA_Embedding_")
+            or name.startswith("VERBA_Cache_")
+        ]
+        await self.delete_collections(client, collection_names)
+
+        # Projections of the dropped collections describe chunks that no longer exist
+        if self.config_collection_name in collections:
+            config_collection = client.collections.get(self.config_collection_name)
+            projection_uuids = [
+                self.get_collection_projection_uuid(name)
+                for name in collection_names
+                if name.startswith("VERBA_Embedding_")
+            ]
+            if projection_uuids:
+                await config_collection.data.delete_many(
+                    where=Filter.by_id().contains_any(projection_uuids)
+                )
 
     async def delete_all_configs(self, client: WeaviateAsyncClient):
-        if await self.verify_collection(client, self.config_collection_name):
-            config_collection = client.collections.get(self.config_collection_name)
-            async for item in config_collection.iterator():
-                await config_collection.data.delete_by_id(item.uuid)
+        await self.delete_collections(client, [self.config_collection_name])
 
     async def delete_all(self, client: WeaviateAsyncClient):
-        node_payload, collection_payload = await self.get_metadata(client)
-        for collection in collection_payload["collections"]:
-            if "VERBA" in collection["name"]:
-                await client.collections.delete(collection["name"])
+        collections = await client.collections.list_all(simple=True)
+        await self.delete_collections(
+            client, [name for name in collections.keys() if "VERBA" in name]
+        )
+        self.forget_collections(client)
+
+    async def delete_collections(
+        self, client: WeaviateAsyncClient, collection_names: list[str]
+    ):
+        """Delete whole collections concurrently"""
+
+        async def delete_collection(collection_name: str):
+            if await client.collections.exists(collection_name):
+                await client.collections.delete(collection_name)
+                msg.info(f"Deleted collection {collection_name}")
+
+        await asyncio.gather(*[delete_collection(name) for name in collection_names])
+        self.forget_collections(client, collection_names)
 
     async def get_documents(
         self,
@@ -551,6 +981,21 @@ class WeaviateManager:
                 msg.warn(f"Document not found ({uuid})")
                 return None
 
+    async def get_documents_by_ids(
+        self, client: WeaviateAsyncClient, uuids: list[str], properties: list[str] = None
+    ) -> dict[str, dict]:
+        """Fetch several documents in one request, returns a map of uuid to properties"""
+        if not uuids:
+            return {}
+        if await self.verify_collection(client, self.document_collection_name):
+            document_collection = client.collections.get(self.document_collection_name)
+            response = await document_collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(uuids),
+                limit=len(uuids),
+                return_properties=properties,
+            )
+            return {str(obj.uuid): obj.properties for obj in response.objects}
+
     ### Labels
 
     async def get_labels(self, client: WeaviateAsyncClient) -> list[str]:
@@ -609,8 +1054,169 @@ class WeaviateManager:
                     chunk["doc_uuid"] = str(chunk["doc_uuid"])
                 return chunks
 
+    ### Projections
+
+    def get_projection_uuid(self, embedder: str) -> str:
+        return self.get_collection_projection_uuid(
+            self.get_embedding_collection_name(embedder)
+        )
+
+    def get_collection_projection_uuid(self, collection_name: str) -> str:
+        return generate_uuid5(f"projection/{collection_name}")
+
+    async def save_projection(
+        self, client: WeaviateAsyncClient, embedder: str, projection: Projection
+    ):
+        await self.set_config(
+            client, self.get_projection_uuid(embedder), projection.to_json()
+        )
+
+    async def get_projection(
+        self, client: WeaviateAsyncClient, embedder: str
+    ) -> Projection:
+        """Load the projection of an embedding collection.
+        Once the collection holds projection_warmup chunks the projection is fitted on a sample, frozen and stored, it is never refit afterwards.
+        @returns Projection - Unfitted while the collection is still warming up
+        """
+        collection_name = self.get_embedding_collection_name(embedder)
+        projections = self.projection_registry.setdefault(client, {})
+        if collection_name in projections:
+            return projections[collection_name]
+
+        async with self.projection_locks.setdefault(embedder, asyncio.Lock()):
+            if collection_name in projections:
+                return projections[collection_name]
+
+            stored = await self.get_config(client, self.get_projection_uuid(embedder))
+            if stored is not None and stored.get("fitted"):
+                projection = Projection.from_json(stored)
+                projections[collection_name] = projection
+                return projection
+
+            count = await self.count_chunks(client, embedder)
+            if stored is None:
+                projection = Projection()
+                # Chunks of an empty collection only ever get coordinates from the frozen projection
+                projection.complete = count == 0
+            else:
+                projection = Projection.from_json(stored)
+
+            if count >= self.projection_warmup:
+                complete = projection.complete
+                projection = await self.fit_projection(client, embedder)
+                projection.complete = complete
+                await self.save_projection(client, embedder, projection)
+                projections[collection_name] = projection
+                msg.good(f"Froze projection for {embedder}")
+            elif stored is None:
+                await self.save_projection(client, embedder, projection)
+            return projection
+
+    async def count_chunks(self, client: WeaviateAsyncClient, embedder: str) -> int:
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            response = await embedder_collection.aggregate.over_all(total_count=True)
+            return response.total_count
+        return 0
+
+    async def project_chunks(
+        self, client: WeaviateAsyncClient, embedder: str, documents: list[Document]
+    ):
+        """Store the 3D coordinates of new chunk vectors in chunk.pca using the frozen projection of the embedding collection.
+        Chunks ingested while the collection is warming up are left without coordinates and projected on request.
+        """
+        chunks = [chunk for document in documents for chunk in document.chunks]
+        if not chunks:
+            return
+        projection = await self.get_projection(client, embedder)
+        if not projection.fitted:
+            for chunk in chunks:
+                chunk.pca = None
+            return
+        coordinates = await asyncio.to_thread(
+            projection.transform, [chunk.vector for chunk in chunks]
+        )
+        for chunk, coordinate in zip(chunks, coordinates):
+            chunk.pca = coordinate
+
+    async def project_objects(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        projection: Projection,
+        objects: list,
+    ) -> list[list[float]]:
+        """3D coordinates of chunk objects. Stored coordinates are used if they come from the frozen projection, the other chunks are projected from their vectors.
+        @parameter: projection : Projection - Projection of the collection, see get_projection
+        @parameter: objects : list - Chunk objects with the pca property, vectors are fetched if not included
+        @returns list[list[float]] - Coordinates in the order of the objects
+        """
+        if not projection.fitted:
+            # Collections that are still warming up are fitted on request, they are small
+            projection = await self.fit_projection(client, embedder)
+        if projection.fitted and projection.complete:
+            missing = [item for item in objects if item.properties.get("pca") is None]
+        else:
+            missing = objects
+        if not missing:
+            return [item.properties["pca"] for item in objects]
+
+        vectors = {
+            item.uuid: item.vector["default"] for item in missing if item.vector
+        }
+        without_vector = [item.uuid for item in missing if item.uuid not in vectors]
+        if without_vector:
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            response = await embedder_collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(without_vector),
+                limit=len(without_vector),
+                return_properties=[],
+                include_vector=True,
+            )
+            for item in response.objects:
+                vectors[item.uuid] = item.vector["default"]
+
+        uuids = [item.uuid for item in missing if item.uuid in vectors]
+        coordinates = await asyncio.to_thread(
+            projection.transform, [vectors[uuid] for uuid in uuids]
+        )
+        projected = dict(zip(uuids, coordinates))
+        return [
+            projected.get(item.uuid, item.properties.get("pca")) for item in objects
+        ]
+
+    async def fit_projection(
+        self, client: WeaviateAsyncClient, embedder: str, batch_size: int = 1000
+    ) -> Projection:
+        """Fit a projection over streamed batches of up to projection_sample_size vectors"""
+        projection = Projection()
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            batch = []
+            seen = 0
+            # The iterator walks objects in uuid order, which makes the first vectors a random sample
+            async for item in embedder_collection.iterator(
+                include_vector=True, return_properties=["chunk_id"]
+            ):
+                batch.append(item.vector["default"])
+                seen += 1
+                if len(batch) >= batch_size:
+                    await asyncio.to_thread(projection.partial_fit, batch)
+                    batch = []
+                if seen >= self.projection_sample_size:
+                    break
+            if batch:
+                await asyncio.to_thread(projection.partial_fit, batch)
+            msg.info(f"Fitted projection for {embedder} on {seen} vectors")
+        return projection
+
     async def get_vectors(
-        self, client: WeaviateAsyncClient, uuid: str, showAll: bool
+        self,
+        client: WeaviateAsyncClient,
+        uuid: str,
+        showAll: bool,
+        page_size: int = 2000,
+        cursor: str | None = None,
     ) -> dict:
 
         document = await self.get_document(client, uuid, properties=["meta", "title"])
@@ -625,43 +1231,34 @@ class WeaviateManager:
             embedder_collection = client.collections.get(self.embedding_table[embedder])
 
             if not showAll:
-                batch_size = 250
-                all_chunks = []
-                offset = 0
-                total_time = 0
-                call_count = 0
-
-                while True:
-                    call_start_time = asyncio.get_event_loop().time()
-                    weaviate_chunks = await embedder_collection.query.fetch_objects(
-                        filters=Filter.by_property("doc_uuid").equal(uuid),
-                        limit=batch_size,
-                        offset=offset,
-                        return_properties=["chunk_id", "pca"],
-                        include_vector=True,
-                    )
-                    call_end_time = asyncio.get_event_loop().time()
-                    call_duration = call_end_time - call_start_time
-                    total_time += call_duration
-                    call_count += 1
-
-                    all_chunks.extend(weaviate_chunks.objects)
-
-                    if len(weaviate_chunks.objects) < batch_size:
-                        break
-
-                    offset += batch_size
+                all_chunks = await self.get_document_chunks(
+                    client,
+                    embedder,
+                    uuid,
+                    include_vector=True,
+                    return_properties=["pca"],
+                )
+                if not all_chunks:
+                    return {
+                        "embedder": embedder,
+                        "dimensions": 0,
+                        "groups": [{"name": document["title"], "chunks": []}],
+                    }
 
                 dimensions = len(all_chunks[0].vector["default"])
 
+                projection = await self.get_projection(client, embedder)
+                coordinates = await self.project_objects(
+                    client, embedder, projection, all_chunks
+                )
                 chunks = [
                     {
                         "vector": {"x": pca[0], "y": pca[1], "z": pca[2]},
                         "uuid": str(item.uuid),
                         "chunk_id": item.properties["chunk_id"],
                     }
-                    for item in all_chunks
-                    if (pca := item.properties["pca"]) is not None
+                    for item, pca in zip(all_chunks, coordinates)
+                    if pca is not None
                 ]
                 return {
                     "embedder": embedder,
@@ -669,71 +1266,58 @@ class WeaviateManager:
                     "groups": [{"name": document["title"], "chunks": chunks}],
                 }
 
-            # Generate PCA for all embeddings
+            # Return a page of all embeddings in the global projection
             else:
-                vector_map = {}
-                vector_list, vector_ids, vector_chunk_uuids, vector_chunk_ids = (
-                    [],
-                    [],
-                    [],
-                    [],
+                projection = await self.get_projection(client, embedder)
+                # Stored coordinates are only comparable if they all come from the frozen projection
+                response = await embedder_collection.query.fetch_objects(
+                    limit=page_size,
+                    after=cursor,
+                    return_properties=["doc_uuid", "chunk_id", "pca"],
+                    include_vector=not (projection.fitted and projection.complete),
+                )
+                objects = response.objects
+                documents = await self.get_documents_by_ids(
+                    client,
+                    list({str(item.properties["doc_uuid"]) for item in objects}),
+                    properties=["title"],
+                )
+                coordinates = await self.project_objects(
+                    client, embedder, projection, objects
                 )
-                dimensions = 0
 
-                async for item in embedder_collection.iterator(include_vector=True):
-                    doc_uuid = item.properties["doc_uuid"]
-                    chunk_uuid = item.uuid
+                vector_map = {}
+                for item, coordinate in zip(objects, coordinates):
+                    doc_uuid = str(item.properties["doc_uuid"])
+                    if doc_uuid not in documents:
+                        continue
                     if doc_uuid not in vector_map:
-                        _document = await self.get_document(client, doc_uuid)
-                        if _document:
-                            vector_map[doc_uuid] = {
-                                "name": _document["title"],
-                                "chunks": [],
-                            }
-                        else:
-                            continue
-                    vector_list.append(item.vector["default"])
-                    dimensions = len(item.vector["default"])
-                    vector_ids.append(doc_uuid)
-                    vector_chunk_uuids.append(chunk_uuid)
-                    vector_chunk_ids.append(item.properties["chunk_id"])
-
-                if len(vector_ids) > 3:
-                    pca = PCA(n_components=3)
-                    generated_pca_embeddings = pca.fit_transform(vector_list)
-                    pca_embeddings = [
-                        pca_.tolist() for pca_ in generated_pca_embeddings
-                    ]
-
-                    for pca_embedding, _uuid, _chunk_uuid, _chunk_id in zip(
-                        pca_embeddings,
-                        vector_ids,
-                        vector_chunk_uuids,
-                        vector_chunk_ids,
-                    ):
-                        vector_map[_uuid]["chunks"].append(
-                            {
-                                "vector": {
-                                    "x": pca_embedding[0],
-                                    "y": pca_embedding[1],
-                                    "z": pca_embedding[2],
-                                },
-                                "uuid": str(_chunk_uuid),
-                                "chunk_id": _chunk_id,
-                            }
-                        )
+                        vector_map[doc_uuid] = {
+                            "name": documents[doc_uuid]["title"],
+                            "chunks": [],
+                        }
+                    vector_map[doc_uuid]["chunks"].append(
+                        {
+                            "vector": {
+                                "x": coordinate[0],
+                                "y": coordinate[1],
+                                "z": coordinate[2],
+                            },
+                            "uuid": str(item.uuid),
+                            "chunk_id": item.properties["chunk_id"],
+                        }
+                    )
 
-                    return {
-                        "embedder": embedder,
-                        "dimensions": dimensions,
-                        "groups": list(vector_map.values()),
-                    }
-                else:
-                    return {
-                        "embedder": embedder,
-                        "dimensions": dimensions,
-                        "groups": [],
-                    }
+                return {
+                    "embedder": embedder,
+                    "dimensions": projection.dimensions
+                    or (len(objects[0].vector["default"]) if objects else 0),
+                    "groups": list(vector_map.values()),
+                    # Objects are paged in uuid order, so every page is a random sample
+                    "cursor": (
+                        str(objects[-1].uuid) if len(objects) == page_size else None
+                    ),
+                }
 
         return None
 
@@ -803,6 +1387,43 @@ class WeaviateManager:
             )
             return weaviate_chunks.objects
 
+    async def get_chunks_by_document_ids(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        ids_by_document: dict[str, list[int]],
+    ) -> dict[str, list]:
+        """Fetch chunks of several documents by chunk_id in one request, returns a map of doc_uuid to chunks"""
+        ids_by_document = {
+            doc_uuid: list(ids) for doc_uuid, ids in ids_by_document.items() if ids
+        }
+        if not ids_by_document:
+            return {}
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+
+            filters = None
+            for doc_uuid, ids in ids_by_document.items():
+                document_filter = Filter.by_property("doc_uuid").equal(
+                    doc_uuid
+                ) & Filter.by_property("chunk_id").contains_any(ids)
+                filters = (
+                    document_filter if filters is None else filters | document_filter
+                )
+
+            weaviate_chunks = await embedder_collection.query.fetch_objects(
+                filters=filters,
+                limit=sum(len(ids) for ids in ids_by_document.values()),
+                sort=Sort.by_property("chunk_id", ascending=True),
+            )
+
+            chunks_by_document = {doc_uuid: [] for doc_uuid in ids_by_document}
+            for chunk in weaviate_chunks.objects:
+                doc_uuid = str(chunk.properties["doc_uuid"])
+                if doc_uuid in chunks_by_document:
+                    chunks_by_document[doc_uuid].append(chunk)
+            return chunks_by_document
+
     ### Suggestion Logic
 
     async def add_suggestion(self, client: WeaviateAsyncClient, query: str):
@@ -881,10 +1502,107 @@ class WeaviateManager:
     async def delete_all_suggestions(self, client: WeaviateAsyncClient):
         if await self.verify_collection(client, self.suggestion_collection_name):
             await client.collections.delete(self.suggestion_collection_name)
+            self.forget_collections(client, [self.suggestion_collection_name])
 
     ### Cache Logic
 
-    # TODO: Implement Cache Logic
+    async def get_semantic_cache(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        kind: str,
+        key: str,
+        vector: list[float],
+    ) -> dict | None:
+        """Find the closest cached entry of the same kind and key within the distance threshold and TTL
+        @parameter: kind : str - "retrieval" for retrieved context or "answer" for generated answers
+        @parameter: key : str - Hash of everything besides the query the entry depends on
+        @returns dict - Properties of the entry or None
+        """
+        if not self.semantic_cache_enabled:
+            return None
+        try:
+            if await self.verify_cache_collection(client, embedder):
+                cache_collection = client.collections.get(self.cache_table[embedder])
+                response = await cache_collection.query.near_vector(
+                    near_vector=vector,
+                    distance=self.semantic_cache_distance,
+                    limit=1,
+                    filters=(
+                        Filter.by_property("kind").equal(kind)
+                        & Filter.by_property("key").equal(key)
+                        & Filter.by_property("created").greater_than(
+                            time.time() - self.semantic_cache_ttl
+                        )
+                    ),
+                )
+                if response.objects:
+                    msg.good(f"Semantic cache hit ({kind})")
+                    return response.objects[0].properties
+        except Exception as e:
+            # An empty cache collection has no schema to filter on yet
+            msg.info(f"Semantic cache lookup skipped: {str(e)}")
+        return None
+
+    async def add_semantic_cache(
+        self,
+        client: WeaviateAsyncClient,
+        embedder: str,
+        kind: str,
+        key: str,
+        query: str,
+        vector: list[float],
+        properties: dict,
+    ):
+        """Store an entry in the semantic cache, replacing the entry of the same query"""
+        if not self.semantic_cache_enabled:
+            return
+        try:
+            if await self.verify_cache_collection(client, embedder):
+                cache_collection = client.collections.get(self.cache_table[embedder])
+                uuid = generate_uuid5(f"{kind}/{key}/{QueryCache.normalize(query)}")
+                properties = {
+                    **properties,
+                    "kind": kind,
+                    "key": key,
+                    "query": query,
+                    "created": time.time(),
+                }
+                if await cache_collection.data.exists(uuid):
+                    await cache_collection.data.replace(
+                        uuid=uuid, properties=properties, vector=vector
+                    )
+                else:
+                    await cache_collection.data.insert(
+                        properties=properties, uuid=uuid, vector=vector
+                    )
+                await self.expire_semantic_cache(client, embedder)
+        except Exception as e:
+            msg.warn(f"Couldn't add to semantic cache: {str(e)}")
+
+    async def expire_semantic_cache(self, client: WeaviateAsyncClient, embedder: str):
+        """Delete expired entries, at most once every tenth of the TTL"""
+        now = time.time()
+        last_expired = self.semantic_cache_expired_at.get(embedder, 0)
+        if now - last_expired < self.semantic_cache_ttl / 10:
+            return
+        self.semantic_cache_expired_at[embedder] = now
+        cache_collection = client.collections.get(self.cache_table[embedder])
+        await cache_collection.data.delete_many(
+            where=Filter.by_property("created").less_than(now - self.semantic_cache_ttl)
+        )
+
+    async def invalidate_semantic_cache(
+        self, client: WeaviateAsyncClient, embedder: str
+    ):
+        """Drop all cached entries of an embedding collection after its documents changed"""
+        if not self.semantic_cache_enabled:
+            return
+        collection_name = self.get_cache_collection_name(embedder)
+        if await client.collections.exists(collection_name):
+            await client.collections.delete(collection_name)
+            msg.info(f"Invalidated semantic cache {collection_name}")
+        self.forget_collections(client, [collection_name])
 
     ### Metadata Retrieval
 
@@ -929,49 +1647,120 @@ class ReaderManager:
     async def load(
         self, reader: str, fileConfig: FileConfig, logger: LoggerManager
     ) -> list[Document]:
-        try:
-            loop = asyncio.get_running_loop()
-            start_time = loop.time()
-            if reader in self.readers:
-                config = fileConfig.rag_config["Reader"].components[reader].config
-                documents: list[Document] = await self.readers[reader].load(
-                    config, fileConfig
-                )
-                for document in documents:
-                    document.meta["Reader"] = (
-                        fileConfig.rag_config["Reader"].components[reader].model_dump()
-                    )
-                elapsed_time = round(loop.time() - start_time, 2)
-                if len(documents) == 1:
-                    await logger.send_report(
-                        fileConfig.fileID,
-                        FileStatus.LOADING,
-                        f"Loaded {fileConfig.filename}",
-                        took=elapsed_time,
-                    )
-                else:
-                    await logger.send_report(
-                        fileConfig.fileID,
-                        FileStatus.LOADING,
-                        f"Loaded {fileConfig.filename} with {len(documents)} documents",
-                        took=elapsed_time,
-                    )
-                await logger.send_report(
-                    fileConfig.fileID, FileStatus.CHUNKING, "", took=0
-                )
-                return documents
-            else:
-                raise Exception(f"{reader} Reader not found")
+        return [
+            document async for document in self.stream(reader, fileConfig, logger)
+        ]
 
+    async def stream(
+        self, reader: str, fileConfig: FileConfig, logger: LoggerManager
+    ) -> AsyncIterator[Document]:
+        """Yield the documents of a reader as they are loaded"""
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        if reader not in self.readers:
+            raise Exception(f"Reader {reader} failed with: {reader} Reader not found")
+
+        config = fileConfig.rag_config["Reader"].components[reader].config
+        reader_meta = fileConfig.rag_config["Reader"].components[reader].model_dump()
+        count = 0
+        try:
+            async for document in self.readers[reader].stream(config, fileConfig):
+                document.meta["Reader"] = reader_meta
+                count += 1
+                yield document
         except Exception as e:
             raise Exception(f"Reader {reader} failed with: {str(e)}")
 
+        elapsed_time = round(loop.time() - start_time, 2)
+        if count == 1:
+            await logger.send_report(
+                fileConfig.fileID,
+                FileStatus.LOADING,
+                f"Loaded {fileConfig.filename}",
+                took=elapsed_time,
+            )
+        else:
+            await logger.send_report(
+                fileConfig.fileID,
+                FileStatus.LOADING,
+                f"Loaded {fileConfig.filename} with {count} documents",
+                took=elapsed_time,
+            )
+        await logger.send_report(fileConfig.fileID, FileStatus.CHUNKING, "", took=0)
+
+
+def chunk_in_worker(chunker: str, config: dict, contents: list[str]) -> list[list[dict]]:
+    """Chunk raw document contents inside a worker process
+    @parameter: chunker : str - Name of a cpu_bound Chunker
+    @parameter: config : dict - Chunker Configuration
+    @parameter: contents : list[str] - Content of each document
+    @returns list[list[dict]] - Plain chunk records per document
+    """
+    worker_chunkers = {_chunker.name: _chunker for _chunker in chunkers}
+    documents = [Document(content=content) for content in contents]
+    asyncio.run(worker_chunkers[chunker].chunk(config=config, documents=documents))
+    return [
+        [
+            {
+                "content": chunk.content,
+                "content_without_overlap": chunk.content_without_overlap,
+                "chunk_id": chunk.chunk_id,
+                "start_i": chunk.start_i,
+                "end_i": chunk.end_i,
+            }
+            for chunk in document.chunks
+        ]
+        for document in documents
+    ]
+
 
 class ChunkerManager:
     def __init__(self):
         self.chunkers: dict[str, Chunker] = {
             chunker.name: chunker for chunker in chunkers
         }
+        # Number of worker processes for cpu_bound chunkers, 0 chunks on the event loop
+        self.workers = int(os.getenv("VERBA_CHUNKER_WORKERS", "0"))
+        self.executor: ProcessPoolExecutor | None = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            msg.info(f"Starting chunking process pool with {self.workers} workers")
+            # Spawned, forking the running server would copy the locks held by its threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def chunk_in_pool(
+        self, chunker: str, config: dict, documents: list[Document]
+    ) -> list[Document]:
+        """Run a cpu_bound chunker in the process pool and attach the returned chunks"""
+        pending = [document for document in documents if len(document.chunks) == 0]
+        if not pending:
+            return documents
+
+        loop = asyncio.get_running_loop()
+        records = await loop.run_in_executor(
+            self.get_executor(),
+            partial(
+                chunk_in_worker,
+                chunker,
+                config,
+                [document.content for document in pending],
+            ),
+        )
+
+        for document, chunk_records in zip(pending, records):
+            document.chunks = [Chunk(**record) for record in chunk_records]
+
+        return documents
 
     async def chunk(
         self,
@@ -989,12 +1778,17 @@ class ChunkerManager:
                 embedder_config = (
                     fileConfig.rag_config["Embedder"].components[embedder.name].config
                 )
-                chunked_documents = await self.chunkers[chunker].chunk(
-                    config=config,
-                    documents=documents,
-                    embedder=embedder,
-                    embedder_config=embedder_config,
-                )
+                if self.workers > 0 and self.chunkers[chunker].cpu_bound:
+                    chunked_documents = await self.chunk_in_pool(
+                        chunker, config, documents
+                    )
+                else:
+                    chunked_documents = await self.chunkers[chunker].chunk(
+                        config=config,
+                        documents=documents,
+                        embedder=embedder,
+                        embedder_config=embedder_config,
+                    )
                 for chunked_document in chunked_documents:
                     chunked_document.meta["Chunker"] = (
                         fileConfig.rag_config["Chunker"]
@@ -1032,6 +1826,43 @@ class EmbeddingManager:
         self.embedders: dict[str, Embedding] = {
             embedder.name: embedder for embedder in embedders
         }
+        self.cache = create_embedding_cache()
+        self.query_cache = create_query_cache()
+        self.rate_limiters: dict[str, AdaptiveBatchController] = {}
+        self.request_concurrency = int(
+            os.getenv("VERBA_EMBEDDING_REQUEST_CONCURRENCY", "8")
+        )
+        self.max_retries = int(os.getenv("VERBA_EMBEDDING_MAX_RETRIES", "6"))
+        self.target_latency = float(os.getenv("VERBA_EMBEDDING_TARGET_LATENCY", "10"))
+
+    async def warmup(self):
+        """Let all Embedders load their local models before the first request"""
+        await asyncio.gather(
+            *[embedder.warmup() for embedder in self.embedders.values()]
+        )
+
+    def get_rate_limiter(self, embedder: str, config: dict) -> AdaptiveBatchController:
+        """Return the batch controller shared by all requests to the same Embedder and API Key"""
+        api_key = config["API Key"].value if "API Key" in config else ""
+        key = f"{embedder}/{hash_text(api_key)[:16]}"
+        if key not in self.rate_limiters:
+            self.rate_limiters[key] = AdaptiveBatchController(
+                max_batch_size=self.embedders[embedder].max_batch_size,
+                max_concurrency=self.request_concurrency,
+                target_latency=self.target_latency,
+                max_retries=self.max_retries,
+                max_batch_tokens=self.embedders[embedder].max_batch_tokens,
+            )
+        return self.rate_limiters[key]
+
+    def get_cache_model(self, embedder: str, config: dict) -> str:
+        """Identify the embedding space of an Embedder configuration for caching"""
+        settings = [
+            str(config[setting].value)
+            for setting in self.embedders[embedder].vector_settings
+            if setting in config
+        ]
+        return "/".join([embedder, *settings])
 
     async def vectorize(
         self,
@@ -1051,27 +1882,19 @@ class EmbeddingManager:
                 config = fileConfig.rag_config["Embedder"].components[embedder].config
 
                 for document in documents:
+                    # Chunks may already carry a reused vector
+                    pending = [
+                        chunk for chunk in document.chunks if chunk.vector is None
+                    ]
                     content = [
-                        document.metadata + "\n" + chunk.content
-                        for chunk in document.chunks
+                        document.metadata + "\n" + chunk.content for chunk in pending
                     ]
-                    embeddings = await self.batch_vectorize(embedder, config, content)
-
-                    if len(embeddings) >= 3:
-                        pca = PCA(n_components=3)
-                        generated_pca_embeddings = pca.fit_transform(embeddings)
-                        pca_embeddings = [
-                            pca_.tolist() for pca_ in generated_pca_embeddings
-                        ]
-                    else:
-                        pca_embeddings = [embedding[0:3] for embedding in embeddings]
-
-                    for vector, chunk, pca_ in zip(
-                        embeddings, document.chunks, pca_embeddings
-                    ):
-                        chunk.vector = vector
-                        chunk.pca = pca_
-
+                    if content:
+                        pending_embeddings = await self.batch_vectorize(
+                            embedder, config, content
+                        )
+                        for chunk, vector in zip(pending, pending_embeddings):
+                            chunk.vector = vector
                     document.meta["Embedder"] = (
                         fileConfig.rag_config["Embedder"]
                         .components[embedder]
@@ -1097,46 +1920,87 @@ class EmbeddingManager:
     async def batch_vectorize(
         self, embedder: str, config: dict, content: list[str]
     ) -> list[list[float]]:
-        """Vectorize content in batches"""
+        """Vectorize content in batches, only embedding content missing from the cache"""
         try:
-            batches = [
-                content[i : i + self.embedders[embedder].max_batch_size]
-                for i in range(0, len(content), self.embedders[embedder].max_batch_size)
-            ]
-            msg.info(f"Vectorizing {len(content)} chunks in {len(batches)} batches")
-            tasks = [
-                self.embedders[embedder].vectorize(config, batch) for batch in batches
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Check if all tasks were successful
-            errors = [r for r in results if isinstance(r, Exception)]
-            if errors:
-                error_messages = [str(e) for e in errors]
-                raise Exception(
-                    f"Vectorization failed for some batches: {', '.join(error_messages)}"
-                )
+            if self.cache is None:
+                return await self.vectorize_batches(embedder, config, content)
+
+            model = self.get_cache_model(embedder, config)
+            hashes = [hash_text(text) for text in content]
+            cached = await self.cache.aget_many(model, hashes)
 
-            # Flatten the results
-            flattened_results = [item for sublist in results for item in sublist]
+            missing = {}
+            for _hash, text in zip(hashes, content):
+                if _hash not in cached and _hash not in missing:
+                    missing[_hash] = text
+
+            msg.info(
+                f"Embedding cache: {len(content) - len(missing)} of {len(content)} chunks cached"
+            )
 
-            # Verify the number of vectors matches the input content
-            if len(flattened_results) != len(content):
-                raise Exception(
-                    f"Mismatch in vectorization results: expected {len(content)} vectors, got {len(flattened_results)}"
+            if missing:
+                embeddings = await self.vectorize_batches(
+                    embedder, config, list(missing.values())
                 )
+                new_entries = dict(zip(missing.keys(), embeddings))
+                await self.cache.aput_many(model, new_entries)
+                cached.update(new_entries)
 
-            return flattened_results
+            return [cached[_hash] for _hash in hashes]
         except Exception as e:
             raise Exception(f"Batch vectorization failed: {str(e)}")
 
+    async def vectorize_batches(
+        self, embedder: str, config: dict, content: list[str]
+    ) -> list[list[float]]:
+        """Send content to the Embedder in adaptive batches packed up to max_batch_size texts and max_batch_tokens tokens, retrying rate limited and failed batches"""
+        controller = self.get_rate_limiter(embedder, config)
+        msg.info(
+            f"Vectorizing {len(content)} chunks (batch size {controller.batch_size}, concurrency {controller.concurrency})"
+        )
+        token_counts = None
+        if controller.max_batch_tokens is not None:
+            token_counts = await asyncio.to_thread(
+                self.embedders[embedder].count_tokens, content
+            )
+        flattened_results = await controller.run(
+            content,
+            lambda batch: self.embedders[embedder].vectorize(config, batch),
+            token_counts,
+        )
+
+        # Verify the number of vectors matches the input content
+        if len(flattened_results) != len(content):
+            raise Exception(
+                f"Mismatch in vectorization results: expected {len(content)} vectors, got {len(flattened_results)}"
+            )
+
+        return flattened_results
+
+    def get_cache_stats(self) -> dict:
+        return {
+            "embedding_cache": self.cache.stats() if self.cache else None,
+            "query_cache": self.query_cache.stats(),
+            "rate_limiters": {
+                key: controller.stats()
+                for key, controller in self.rate_limiters.items()
+            },
+        }
+
     async def vectorize_query(
         self, embedder: str, content: str, rag_config: dict
     ) -> list[float]:
         try:
             if embedder in self.embedders:
                 config = rag_config["Embedder"].components[embedder].config
+                key = self.query_cache.key(
+                    embedder, self.get_cache_model(embedder, config), content
+                )
+                vector = self.query_cache.get(key)
+                if vector is not None:
+                    return vector
                 embeddings = await self.embedders[embedder].vectorize(config, [content])
+                self.query_cache.put(key, embeddings[0])
                 return embeddings[0]
             else:
                 raise Exception(f"{embedder} Embedder not found")
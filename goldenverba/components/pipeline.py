@@ -0,0 +1,105 @@
+import asyncio
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
+
+from wasabi import msg
+
+
+class PipelineStage:
+    """
+    A named step of the IngestionPipeline with its own concurrency limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+    ):
+        self.name = name
+        self.process = process
+        self.concurrency = max(1, concurrency)
+
+
+class IngestionPipeline:
+    """
+    Runs items through a sequence of stages connected by bounded queues.
+    Every stage has its own pool of workers, so stage N+1 of one item overlaps stage N of the next,
+    and the queue size caps how many items are held between stages at any time.
+    """
+
+    def __init__(self, stages: list[PipelineStage], queue_size: int = 8):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    async def run(
+        self,
+        items: Iterable | AsyncIterable,
+        on_error: Callable[[Any, Exception], Awaitable[None]] | None = None,
+    ) -> list:
+        """Feed items through all stages
+        @parameter: items : Iterable | AsyncIterable - Input items, consumed lazily
+        @parameter: on_error : Callable - (Optional) Called with the item and exception when a stage fails
+        @returns list - Result of the last stage or the raised Exception, in input order
+        """
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results: dict[int, Any] = {}
+
+        async def feed():
+            index = 0
+            if hasattr(items, "__aiter__"):
+                async for item in items:
+                    await queues[0].put((index, item))
+                    index += 1
+            else:
+                for item in items:
+                    await queues[0].put((index, item))
+                    index += 1
+            return index
+
+        async def work(stage_index: int):
+            stage = self.stages[stage_index]
+            queue = queues[stage_index]
+            is_last = stage_index == len(self.stages) - 1
+            while True:
+                entry = await queue.get()
+                try:
+                    if entry is None:
+                        return
+                    index, item = entry
+                    try:
+                        output = await stage.process(item)
+                    except Exception as e:
+                        msg.warn(f"Pipeline stage {stage.name} failed: {str(e)}")
+                        results[index] = e
+                        if on_error is not None:
+                            try:
+                                await on_error(item, e)
+                            except Exception as error:
+                                msg.fail(f"Pipeline error handler failed: {error}")
+                        continue
+                    if is_last:
+                        results[index] = output
+                    else:
+                        await queues[stage_index + 1].put((index, output))
+                finally:
+                    queue.task_done()
+
+        workers = [
+            [asyncio.create_task(work(i)) for _ in range(stage.concurrency)]
+            for i, stage in enumerate(self.stages)
+        ]
+
+        try:
+            total = await feed()
+            # Drain stage by stage so every worker sees its sentinel after the last item
+            for queue, stage_workers in zip(queues, workers):
+                for _ in stage_workers:
+                    await queue.put(None)
+                await asyncio.gather(*stage_workers)
+        except BaseException:
+            for stage_workers in workers:
+                for worker in stage_workers:
+                    worker.cancel()
+            raise
+
+        return [results[index] for index in range(total)]
@@ -0,0 +1,90 @@
+import numpy as np
+
+from wasabi import msg
+
+try:
+    from sklearn.decomposition import IncrementalPCA
+except Exception:
+    msg.warn("scikit-learn not installed, your base installation might be corrupted.")
+
+
+class Projection:
+    """
+    Global 3D projection of an embedding collection, fitted once on a sample with IncrementalPCA and frozen afterwards.
+    The fitted state is plain JSON so it can be stored in the config collection and shared across requests.
+    """
+
+    n_components = 3
+    state = [
+        "components_",
+        "mean_",
+        "var_",
+        "singular_values_",
+        "explained_variance_",
+        "explained_variance_ratio_",
+    ]
+
+    def __init__(self):
+        self.model = IncrementalPCA(n_components=self.n_components)
+        self.fitted = False
+        self.dimensions = 0
+        # True if every stored chunk.pca of the collection comes from this projection
+        self.complete = False
+        # Vectors held back while fitting until there are enough for a partial fit
+        self.pending: list[list[float]] = []
+
+    @property
+    def samples(self) -> int:
+        return int(self.model.n_samples_seen_) if self.fitted else 0
+
+    def partial_fit(self, vectors: list[list[float]]):
+        self.pending.extend(vectors)
+        if len(self.pending) < self.n_components:
+            return
+        batch = np.asarray(self.pending, dtype=np.float64)
+        self.pending = []
+        if self.fitted and batch.shape[1] != self.dimensions:
+            raise Exception(
+                f"Projection expects {self.dimensions} dimensions, got {batch.shape[1]}"
+            )
+        self.model.partial_fit(batch)
+        self.fitted = True
+        self.dimensions = batch.shape[1]
+
+    def transform(self, vectors: list[list[float]]) -> list[list[float]]:
+        """Project vectors to 3D, vectors are truncated if there were too few to fit the projection"""
+        if not vectors:
+            return []
+        if not self.fitted:
+            return [list(vector[: self.n_components]) for vector in vectors]
+        matrix = np.asarray(vectors, dtype=np.float64)
+        return ((matrix - self.model.mean_) @ self.model.components_.T).tolist()
+
+    def to_json(self) -> dict:
+        if not self.fitted:
+            return {"fitted": False, "complete": self.complete}
+        return {
+            "fitted": True,
+            "complete": self.complete,
+            "dimensions": self.dimensions,
+            "samples": self.samples,
+            "noise_variance": float(self.model.noise_variance_),
+            **{name: getattr(self.model, name).tolist() for name in self.state},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Projection":
+        projection = cls()
+        projection.complete = data.get("complete", False)
+        if not data.get("fitted", False):
+            return projection
+        model = projection.model
+        for name in cls.state:
+            setattr(model, name, np.asarray(data[name], dtype=np.float64))
+        model.n_samples_seen_ = np.int64(data["samples"])
+        model.noise_variance_ = data["noise_variance"]
+        model.n_components_ = cls.n_components
+        model.n_features_in_ = data["dimensions"]
+        projection.fitted = True
+        projection.dimensions = data["dimensions"]
+        return projection
@@ -0,0 +1,336 @@
+import re
+import time
+import random
+import asyncio
+import contextvars
+from collections import deque
+from typing import Awaitable, Callable
+
+import aiohttp
+from wasabi import msg
+
+# Rate limit headers of the last response seen by the current task
+last_rate_limits: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "last_rate_limits", default=None
+)
+
+
+class RetryableError(Exception):
+    """A request failed in a way that may succeed when retried"""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitError(RetryableError):
+    """The provider rejected a request because a rate limit was exceeded"""
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Parse durations like '20ms', '1.5s', '6m0s' or plain seconds"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def parse_rate_limit_headers(headers) -> dict:
+    """Read the x-ratelimit-* and Retry-After headers used by OpenAI compatible APIs"""
+
+    def number(name: str) -> float | None:
+        try:
+            return float(headers.get(name))
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        "limit_requests": number("x-ratelimit-limit-requests"),
+        "remaining_requests": number("x-ratelimit-remaining-requests"),
+        "limit_tokens": number("x-ratelimit-limit-tokens"),
+        "remaining_tokens": number("x-ratelimit-remaining-tokens"),
+        "retry_after": parse_duration(headers.get("retry-after")),
+    }
+
+
+async def check_response(response: aiohttp.ClientResponse):
+    """Record the rate limit headers of a response and raise for error statuses
+    @parameter: response : aiohttp.ClientResponse - Response of the provider
+    @raises RateLimitError on 429, RetryableError on transient server errors
+    """
+    limits = parse_rate_limit_headers(response.headers)
+    last_rate_limits.set(limits)
+    if response.status == 429:
+        body = await response.text()
+        raise RateLimitError(
+            f"Rate limit exceeded: {body[:200]}", retry_after=limits["retry_after"]
+        )
+    if response.status in (408, 500, 502, 503, 504):
+        body = await response.text()
+        raise RetryableError(
+            f"HTTP Error {response.status}: {body[:200]}",
+            retry_after=limits["retry_after"],
+        )
+    response.raise_for_status()
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, RetryableError):
+        return True
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in (408, 429, 500, 502, 503, 504)
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+def estimate_tokens(texts: list[str]) -> int:
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Async token bucket, unlimited until a limit is reported by the provider.
+    """
+
+    def __init__(self, rate: float | None = None, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity or 0
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        if self.rate is not None:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        if self.rate is None:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            self.refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def update(self, limit: float | None, remaining: float | None):
+        """Align the bucket with a per minute limit and the remaining budget reported by the provider"""
+        if limit is None or remaining is None or limit <= 0:
+            return
+        self.refill()
+        self.rate = limit / 60
+        self.capacity = limit
+        self.tokens = min(limit, remaining)
+
+
+class AdaptiveBatchController:
+    """
+    Sends batches to a rate limited provider at the highest throughput it sustains.
+    Batch size and concurrency grow while requests succeed quickly and shrink on slow responses and errors,
+    rate limit headers feed a request and a token bucket, and failed batches are retried with jittered exponential backoff.
+    One controller is shared by all imports that use the same provider and key.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int,
+        max_concurrency: int = 8,
+        target_latency: float = 10.0,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        cooldown: float = 30.0,
+        max_batch_tokens: int | None = None,
+    ):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.batch_size = self.max_batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = self.max_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cooldown = cooldown
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self.paused_until = 0.0
+        self.last_throttle = 0.0
+        self.active = 0
+        self.condition = asyncio.Condition()
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def observe(self, limits: dict | None):
+        if not limits:
+            return
+        self.requests.update(limits["limit_requests"], limits["remaining_requests"])
+        self.tokens.update(limits["limit_tokens"], limits["remaining_tokens"])
+
+    def on_success(self, latency: float, full: bool):
+        if latency > self.target_latency:
+            self.batch_size = max(1, int(self.batch_size * 0.75))
+        elif full:
+            self.batch_size = min(
+                self.max_batch_size, self.batch_size + max(1, self.batch_size // 4)
+            )
+            if time.monotonic() - self.last_throttle > self.cooldown:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+    def on_error(self, error: Exception, attempt: int) -> float:
+        """Shrink the limits after a failed request and return the delay before the retry"""
+        retry_after = getattr(error, "retry_after", None)
+        delay = self.backoff(attempt, retry_after)
+        if isinstance(error, RateLimitError) or (
+            isinstance(error, aiohttp.ClientResponseError) and error.status == 429
+        ):
+            # Throttled requests pause every worker of this provider
+            self.concurrency = max(1, self.concurrency // 2)
+            self.last_throttle = time.monotonic()
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        else:
+            self.batch_size = max(1, self.batch_size // 2)
+        return delay
+
+    async def wait_for_capacity(self, tokens: int):
+        delay = self.paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.paused_until - time.monotonic()
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+    def pack(self, token_counts: list[int], start: int, end: int) -> int:
+        """Return the end of the batch starting at start, filled up to batch_size texts and max_batch_tokens tokens"""
+        limit = min(end, start + self.batch_size)
+        if self.max_batch_tokens is None:
+            return limit
+        stop = start + 1
+        tokens = token_counts[start]
+        while stop < limit and tokens + token_counts[stop] <= self.max_batch_tokens:
+            tokens += token_counts[stop]
+            stop += 1
+        return stop
+
+    async def run(
+        self,
+        items: list[str],
+        call: Callable[[list[str]], Awaitable[list]],
+        token_counts: list[int] | None = None,
+    ) -> list:
+        """Process items in adaptive batches
+        @parameter: items : list[str] - Texts to send
+        @parameter: call : Callable - Sends one batch and returns one result per item
+        @parameter: token_counts : list[int] - (Optional) Tokens per text, estimated from the text length if missing
+        @returns list - Results in input order
+        """
+        if token_counts is None:
+            token_counts = [estimate_tokens([item]) for item in items]
+        results = [None] * len(items)
+        pending = deque()
+        position = 0
+        inflight = 0
+        errors = []
+
+        def has_work() -> bool:
+            return bool(pending) or position < len(items)
+
+        def take() -> tuple[int, int, int]:
+            nonlocal position
+            if pending:
+                return pending.popleft()
+            end = self.pack(token_counts, position, len(items))
+            batch = (position, end, 0)
+            position = end
+            return batch
+
+        async def process(start: int, end: int, attempt: int):
+            batch = items[start:end]
+            await self.wait_for_capacity(sum(token_counts[start:end]))
+            last_rate_limits.set(None)
+            begin = time.monotonic()
+            try:
+                output = await call(batch)
+                if len(output) != len(batch):
+                    raise Exception(
+                        f"Mismatch in batch results: expected {len(batch)}, got {len(output)}"
+                    )
+            except Exception as e:
+                self.observe(last_rate_limits.get())
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    errors.append(e)
+                    return
+                delay = self.on_error(e, attempt)
+                msg.warn(
+                    f"Batch of {len(batch)} failed ({str(e)}), retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                # Re-slice the batch in case the batch size shrank
+                i = start
+                while i < end:
+                    stop = self.pack(token_counts, i, end)
+                    pending.append((i, stop, attempt + 1))
+                    i = stop
+                return
+            self.observe(last_rate_limits.get())
+            # Batches cut short by the token budget say nothing about a larger batch size
+            full = len(batch) >= self.batch_size or (
+                self.max_batch_tokens is not None
+                and end < len(items)
+                and sum(token_counts[start : end + 1]) > self.max_batch_tokens
+            )
+            self.on_success(time.monotonic() - begin, full)
+            results[start:end] = output
+
+        async def worker():
+            nonlocal inflight
+            while True:
+                async with self.condition:
+                    await self.condition.wait_for(
+                        lambda: errors
+                        or (not has_work() and inflight == 0)
+                        or (has_work() and self.active < self.concurrency)
+                    )
+                    if errors or not has_work():
+                        return
+                    start, end, attempt = take()
+                    inflight += 1
+                    self.active += 1
+                try:
+                    await process(start, end, attempt)
+                finally:
+                    async with self.condition:
+                        inflight -= 1
+                        self.active -= 1
+                        self.condition.notify_all()
+
+        await asyncio.gather(*[worker() for _ in range(self.max_concurrency)])
+
+        if errors:
+            raise Exception(
+                f"Vectorization failed for some batches: {', '.join(str(e) for e in errors)}"
+            )
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch_size,
+            "max_batch_tokens": self.max_batch_tokens,
+            "concurrency": self.concurrency,
+            "request_rate": self.requests.rate,
+            "token_rate": self.tokens.rate,
+        }
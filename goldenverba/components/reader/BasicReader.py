@@ -1,6 +1,5 @@
-import base64
 import json
-import io
+from typing import BinaryIO
 
 from wasabi import msg
 
@@ -82,24 +81,24 @@ class BasicReader(Reader):
         msg.info(f"Loading {fileConfig.filename} ({fileConfig.extension.lower()})")
 
         if fileConfig.extension != "":
-            decoded_bytes = base64.b64decode(fileConfig.content)
+            file = fileConfig.open_content()
 
         try:
             if fileConfig.extension == "":
                 file_content = fileConfig.content
             elif fileConfig.extension.lower() == "json":
-                return await self.load_json_file(decoded_bytes, fileConfig)
+                return await self.load_json_file(file, fileConfig)
             elif fileConfig.extension.lower() == "pdf":
-                file_content = await self.load_pdf_file(decoded_bytes)
+                file_content = await self.load_pdf_file(file)
             elif fileConfig.extension.lower() == "docx":
-                file_content = await self.load_docx_file(decoded_bytes)
+                file_content = await self.load_docx_file(file)
             elif fileConfig.extension.lower() in [
                 ext.lstrip(".") for ext in self.extension
             ]:
-                file_content = await self.load_text_file(decoded_bytes)
+                file_content = await self.load_text_file(file)
             else:
                 try:
-                    file_content = await self.load_text_file(decoded_bytes)
+                    file_content = await self.load_text_file(file)
                 except Exception as e:
                     raise ValueError(
                         f"Unsupported file extension: {fileConfig.extension}"
@@ -110,8 +109,9 @@ class BasicReader(Reader):
             msg.fail(f"Failed to load {fileConfig.filename}: {str(e)}")
             raise
 
-    async def load_text_file(self, decoded_bytes: bytes) -> str:
+    async def load_text_file(self, file: BinaryIO) -> str:
         """Load and decode a text file."""
+        decoded_bytes = file.read()
         try:
             return decoded_bytes.decode("utf-8")
         except UnicodeDecodeError:
@@ -119,11 +119,11 @@ class BasicReader(Reader):
             return decoded_bytes.decode("latin-1")
 
     async def load_json_file(
-        self, decoded_bytes: bytes, fileConfig: FileConfig
+        self, file: BinaryIO, fileConfig: FileConfig
     ) -> list[Document]:
         """Load and parse a JSON file."""
         try:
-            json_obj = json.loads(decoded_bytes.decode("utf-8"))
+            json_obj = json.load(file)
             document = Document.from_json(json_obj, self.nlp)
             return (
                 [document]
@@ -133,20 +133,18 @@ class BasicReader(Reader):
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in {fileConfig.filename}: {str(e)}")
 
-    async def load_pdf_file(self, decoded_bytes: bytes) -> str:
+    async def load_pdf_file(self, file: BinaryIO) -> str:
         """Load and extract text from a PDF file."""
         if not PdfReader:
             raise ImportError("pypdf is not installed. Cannot process PDF files.")
-        pdf_bytes = io.BytesIO(decoded_bytes)
-        reader = PdfReader(pdf_bytes)
+        reader = PdfReader(file)
         return "\n\n".join(page.extract_text() for page in reader.pages)
 
-    async def load_docx_file(self, decoded_bytes: bytes) -> str:
+    async def load_docx_file(self, file: BinaryIO) -> str:
         """Load and extract text from a DOCX file."""
         if not docx:
             raise ImportError(
                 "python-docx is not installed. Cannot process DOCX files."
             )
-        docx_bytes = io.BytesIO(decoded_bytes)
-        reader = docx.Document(docx_bytes)
+        reader = docx.Document(file)
         return "\n".join(paragraph.text for paragraph in reader.paragraphs)
@@ -12,6 +12,7 @@ from goldenverba.server.types import FileConfig
 from goldenverba.components.reader.BasicReader import BasicReader
 from goldenverba.components.util import get_environment
 from goldenverba.components.types import InputConfig
+from goldenverba.components.cache import hash_text
 
 
 class FirecrawlReader(Reader):
@@ -81,8 +82,10 @@ class FirecrawlReader(Reader):
                 file_size=len(content_bytes),
                 status=fileConfig.status,
                 status_report=fileConfig.status_report,
+                metadata=fileConfig.metadata,
             )
             document = await reader.load(config, new_file_config)
+            document[0].meta["SourceHash"] = hash_text(content)
             documents.append(document[0])
 
         return documents
@@ -1,7 +1,12 @@
 import aiohttp
+import asyncio
+import io
 import os
-import urllib
-import base64
+import queue
+import tarfile
+import urllib.parse
+from contextlib import aclosing
+from typing import AsyncIterator, Callable
 
 from wasabi import msg
 
@@ -26,6 +31,17 @@ class GitReader(Reader):
         self.description = (
             "Downloads and ingests all files from a GitHub or GitLab Repo."
         )
+        self.github_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip(
+            "/"
+        )
+        self.gitlab_url = os.getenv("GITLAB_URL", "https://gitlab.com").rstrip("/")
+        self.concurrency = int(os.getenv("VERBA_GIT_CONCURRENCY", "8"))
+        # Downloaded archive chunks buffered ahead of the extraction
+        self.archive_buffer_chunks = 16
+        # Large archives can take longer than the total timeout of the shared session
+        self.archive_timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=30, sock_read=120
+        )
         self.config = {
             "Platform": InputConfig(
                 type="dropdown",
@@ -57,6 +73,18 @@ class GitReader(Reader):
                 description="Enter the path or leave it empty to import all",
                 values=[],
             ),
+            "Mode": InputConfig(
+                type="dropdown",
+                value="API",
+                description="Download files one by one through the API, or the whole branch as a single archive",
+                values=["API", "Archive"],
+            ),
+            "Concurrency": InputConfig(
+                type="number",
+                value=self.concurrency,
+                description="Number of files downloaded at once in API mode",
+                values=[],
+            ),
         }
 
         if os.getenv("GITHUB_TOKEN") is None and os.getenv("GITLAB_TOKEN") is None:
@@ -68,62 +96,204 @@ class GitReader(Reader):
             )
 
     async def load(self, config: dict, fileConfig: FileConfig) -> list[Document]:
-        documents = []
+        return [document async for document in self.stream(config, fileConfig)]
+
+    async def stream(
+        self, config: dict, fileConfig: FileConfig
+    ) -> AsyncIterator[Document]:
         platform = config["Platform"].value
         token = self.get_token(config, platform)
+        repo = {
+            "platform": platform,
+            "owner": config["Owner"].value,
+            "name": config["Name"].value,
+            "branch": config["Branch"].value,
+            "path": config["Path"].value,
+            "token": token,
+        }
+        mode = config["Mode"].value if "Mode" in config else "API"
+        concurrency = (
+            int(config["Concurrency"].value)
+            if "Concurrency" in config
+            else self.concurrency
+        )
 
         reader = BasicReader()
 
-        if platform == "GitHub":
-            owner = config["Owner"].value
-            name = config["Name"].value
-            branch = config["Branch"].value
-            path = config["Path"].value
-            fetch_url = f"https://api.github.com/repos/{owner}/{name}/git/trees/{branch}?recursive=1"
-            docs = await self.fetch_docs_github(fetch_url, path, token, reader)
+        async with self.http_session() as session:
+            if mode == "Archive":
+                files = self.download_archive(session, repo, reader)
+            else:
+                files = self.download_files(session, repo, reader, max(1, concurrency))
+            # Closed right away if a document fails, stopping pending downloads
+            async with aclosing(files):
+                async for path, content, link in files:
+                    if not content:
+                        continue
+                    yield await self.create_document(
+                        config, fileConfig, reader, path, content, link
+                    )
+
+    async def create_document(
+        self,
+        config: dict,
+        fileConfig: FileConfig,
+        reader: Reader,
+        path: str,
+        content: bytes,
+        link: str,
+    ) -> Document:
+        new_file_config = FileConfig(
+            fileID=fileConfig.fileID,
+            filename=path,
+            isURL=False,
+            overwrite=fileConfig.overwrite,
+            extension=os.path.splitext(path)[1][1:],
+            source=link,
+            content="",
+            labels=fileConfig.labels,
+            rag_config=fileConfig.rag_config,
+            file_size=len(content),
+            status=fileConfig.status,
+            metadata=fileConfig.metadata,
+            status_report=fileConfig.status_report,
+        )
+        # Raw bytes are handed to the reader without a base64 round trip
+        new_file_config.set_content_file(io.BytesIO(content))
+        try:
+            document = await reader.load(config, new_file_config)
+            return document[0]
+        except Exception as e:
+            raise Exception(f"Couldn't load retrieve {path}: {str(e)}")
+        finally:
+            new_file_config.close_content()
+
+    def is_selected(self, path: str, folder: str, reader: Reader) -> bool:
+        return path.startswith(folder) and any(
+            path.endswith(ext) for ext in reader.extension
+        )
+
+    async def download_files(
+        self,
+        session: aiohttp.ClientSession,
+        repo: dict,
+        reader: Reader,
+        concurrency: int,
+    ) -> AsyncIterator[tuple[str, bytes, str]]:
+        """Download the selected files with at most concurrency requests in flight, yields (path, content, link) in completion order"""
+        if repo["platform"] == "GitHub":
+            fetch_url = f"{self.github_url}/repos/{repo['owner']}/{repo['name']}/git/trees/{repo['branch']}?recursive=1"
+            docs = await self.fetch_docs_github(
+                session, fetch_url, repo["path"], repo["token"], reader
+            )
+            download = self.download_file_github
         else:  # GitLab
-            owner = config["Owner"].value
-            name = config["Name"].value
-            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
-            branch = config["Branch"].value
-            path = config["Path"].value
-            fetch_url = f"https://gitlab.com/api/v4/projects/{project_id}/repository/tree?ref={branch}&path={path}&per_page=100"
-            docs = await self.fetch_docs_gitlab(fetch_url, token, reader)
+            project_id = urllib.parse.quote(f"{repo['owner']}/{repo['name']}", safe="")
+            fetch_url = f"{self.gitlab_url}/api/v4/projects/{project_id}/repository/tree?ref={repo['branch']}&path={repo['path']}&recursive=true&per_page=100"
+            docs = await self.fetch_docs_gitlab(
+                session, fetch_url, repo["token"], reader
+            )
+            download = self.download_file_gitlab
 
         msg.info(f"Fetched {len(docs)} document paths from {fetch_url}")
 
-        for _file in docs:
+        paths = iter(docs)
+        pending = set()
+
+        def schedule():
+            # Only start new downloads as results are consumed to keep memory bounded
+            while len(pending) < concurrency:
+                path = next(paths, None)
+                if path is None:
+                    return
+                pending.add(asyncio.ensure_future(download(session, repo, path)))
+
+        schedule()
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+                schedule()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def download_archive(
+        self, session: aiohttp.ClientSession, repo: dict, reader: Reader
+    ) -> AsyncIterator[tuple[str, bytes, str]]:
+        """Download the branch as one tarball and yield the selected files as (path, content, link)"""
+        if repo["platform"] == "GitHub":
+            url = f"{self.github_url}/repos/{repo['owner']}/{repo['name']}/tarball/{repo['branch']}"
+            headers = self.get_headers(repo["token"], "GitHub")
+        else:  # GitLab
+            project_id = urllib.parse.quote(f"{repo['owner']}/{repo['name']}", safe="")
+            url = f"{self.gitlab_url}/api/v4/projects/{project_id}/repository/archive.tar.gz?sha={urllib.parse.quote(repo['branch'], safe='')}"
+            headers = self.get_headers(repo["token"], "GitLab")
+
+        # Entries are extracted in a thread while the archive is still downloading
+        archive = ArchivePipe(self.archive_buffer_chunks)
+
+        async def download():
             try:
-                if platform == "GitHub":
-                    content, link, size, extension = await self.download_file_github(
-                        owner, name, _file, branch, token
-                    )
-                else:
-                    content, link, size, extension = await self.download_file_gitlab(
-                        owner, name, _file, branch, token
-                    )
+                async with session.get(
+                    url, headers=headers, timeout=self.archive_timeout
+                ) as response:
+                    response.raise_for_status()
+                    async for data in response.content.iter_chunked(1024 * 1024):
+                        await asyncio.to_thread(archive.write, data)
+                msg.info(f"Downloaded archive of {repo['owner']}/{repo['name']}")
+                archive.finish()
+            except BaseException as e:
+                archive.finish(e)
+                raise
 
-                if content:
-                    new_file_config = FileConfig(
-                        fileID=fileConfig.fileID,
-                        filename=_file,
-                        isURL=False,
-                        overwrite=fileConfig.overwrite,
-                        extension=extension,
-                        source=link,
-                        content=content,
-                        labels=fileConfig.labels,
-                        rag_config=fileConfig.rag_config,
-                        file_size=size,
-                        status=fileConfig.status,
-                        status_report=fileConfig.status_report,
+        downloading = asyncio.create_task(download())
+        try:
+            tar = await asyncio.to_thread(tarfile.open, fileobj=archive, mode="r|*")
+            try:
+                while True:
+                    entry = await asyncio.to_thread(
+                        self.next_archive_entry,
+                        tar,
+                        lambda path: self.is_selected(path, repo["path"], reader),
                     )
-                    document = await reader.load(config, new_file_config)
-                    documents.append(document[0])
-            except Exception as e:
-                raise Exception(f"Couldn't load retrieve {_file}: {str(e)}")
+                    if entry is None:
+                        break
+                    path, content = entry
+                    yield path, content, self.get_link(repo, path)
+            finally:
+                tar.close()
+        finally:
+            archive.close()
+            downloading.cancel()
+            await asyncio.gather(downloading, return_exceptions=True)
+
+    @staticmethod
+    def next_archive_entry(
+        tar: tarfile.TarFile, selected: Callable[[str], bool]
+    ) -> tuple[str, bytes] | None:
+        """Read the next selected, non-empty file of a streamed tarball, paths are relative to the repository root.
+        Other entries are skipped without reading their content.
+        """
+        while True:
+            member = tar.next()
+            if member is None:
+                return None
+            if not member.isfile() or member.size == 0:
+                continue
+            # Archives wrap the repository in a single <repo>-<ref> directory
+            path = member.name.split("/", 1)[1] if "/" in member.name else member.name
+            if not selected(path):
+                continue
+            return path, tar.extractfile(member).read()
 
-        return documents
+    def get_link(self, repo: dict, path: str) -> str:
+        if repo["platform"] == "GitHub":
+            return f"https://github.com/{repo['owner']}/{repo['name']}/blob/{repo['branch']}/{path}"
+        return f"{self.gitlab_url}/{repo['owner']}/{repo['name']}/-/blob/{repo['branch']}/{path}"
 
     def get_token(self, config: dict, platform: str) -> str:
         env_var = "GITHUB_TOKEN" if platform == "GitHub" else "GITLAB_TOKEN"
@@ -132,72 +302,72 @@ class GitReader(Reader):
         )
 
     async def fetch_docs_github(
-        self, url: str, folder: str, token: str, reader: Reader
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        folder: str,
+        token: str,
+        reader: Reader,
     ) -> list[str]:
         headers = self.get_headers(token, "GitHub")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return [
-                    item["path"]
-                    for item in data["tree"]
-                    if item["path"].startswith(folder)
-                    and any(item["path"].endswith(ext) for ext in reader.extension)
-                ]
-
-    async def fetch_docs_gitlab(self, url: str, token: str, reader: Reader) -> list:
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return [
+                item["path"]
+                for item in data["tree"]
+                if item["type"] == "blob"
+                and self.is_selected(item["path"], folder, reader)
+            ]
+
+    async def fetch_docs_gitlab(
+        self, session: aiohttp.ClientSession, url: str, token: str, reader: Reader
+    ) -> list:
         headers = self.get_headers(token, "GitLab")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
+        paths = []
+        page = "1"
+        # The tree endpoint is paginated, follow x-next-page until the last page
+        while page:
+            async with session.get(f"{url}&page={page}", headers=headers) as response:
                 response.raise_for_status()
                 data = await response.json()
-                return [
-                    item["path"]
-                    for item in data
-                    if item["type"] == "blob"
-                    and any(item["path"].endswith(ext) for ext in reader.extension)
-                ]
+                page = response.headers.get("x-next-page", "")
+            paths.extend(
+                item["path"]
+                for item in data
+                if item["type"] == "blob" and self.is_selected(item["path"], "", reader)
+            )
+        return paths
 
     async def download_file_github(
-        self, owner: str, name: str, path: str, branch: str, token: str
-    ) -> tuple[str, str, int, str]:
-        url = (
-            f"https://api.github.com/repos/{owner}/{name}/contents/{path}?ref={branch}"
-        )
-        headers = self.get_headers(token, "GitHub")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                content_b64 = data["content"]
-                link = data["html_url"]
-                size = data["size"]
-                extension = os.path.splitext(path)[1][1:]
-                return content_b64, link, size, extension
+        self, session: aiohttp.ClientSession, repo: dict, path: str
+    ) -> tuple[str, bytes, str]:
+        url = f"{self.github_url}/repos/{repo['owner']}/{repo['name']}/contents/{urllib.parse.quote(path)}?ref={repo['branch']}"
+        headers = self.get_headers(repo["token"], "GitHub")
+        # Ask for the raw file instead of base64 encoded JSON
+        headers["Accept"] = "application/vnd.github.raw"
+        async with session.get(url, headers=headers) as response:
+            if response.status != 200:
+                raise Exception(
+                    f"Failed to download file: {response.status} {await response.text()}"
+                )
+            content = await response.read()
+            return path, content, self.get_link(repo, path)
 
     async def download_file_gitlab(
-        self, owner: str, name: str, file_path: str, branch: str, token: str
-    ) -> tuple[str, str, int, str]:
-        project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
-        url = f"https://gitlab.com/api/v4/projects/{project_id}/repository/files/{urllib.parse.quote(file_path, safe='')}/raw?ref={branch}"
-        headers = {"PRIVATE-TOKEN": token}
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    content_b64 = base64.b64encode(content).decode("utf-8")
-                    size = len(content)
-                    extension = os.path.splitext(file_path)[1][1:]
-                    link = (
-                        f"https://gitlab.com/{owner}/{name}/-/blob/{branch}/{file_path}"
-                    )
-                    return content_b64, link, size, extension
-                else:
-                    raise Exception(
-                        f"Failed to download file: {response.status} {await response.text()}"
-                    )
+        self, session: aiohttp.ClientSession, repo: dict, path: str
+    ) -> tuple[str, bytes, str]:
+        project_id = urllib.parse.quote(f"{repo['owner']}/{repo['name']}", safe="")
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/repository/files/{urllib.parse.quote(path, safe='')}/raw?ref={repo['branch']}"
+        headers = {"PRIVATE-TOKEN": repo["token"]}
+
+        async with session.get(url, headers=headers) as response:
+            if response.status != 200:
+                raise Exception(
+                    f"Failed to download file: {response.status} {await response.text()}"
+                )
+            content = await response.read()
+            return path, content, self.get_link(repo, path)
 
     def get_headers(self, token: str, platform: str) -> dict:
         if platform == "GitHub":
@@ -209,3 +379,52 @@ class GitReader(Reader):
             return {
                 "Authorization": f"Bearer {token}",
             }
+
+
+class ArchivePipe(io.RawIOBase):
+    """
+    Read-only file object fed with downloaded chunks from the event loop, read by tarfile in a worker thread.
+    Writes block while buffer_chunks chunks are waiting, so the download never runs far ahead of the extraction.
+    """
+
+    def __init__(self, buffer_chunks: int):
+        self.chunks = queue.Queue(maxsize=buffer_chunks)
+        self.buffer = b""
+        self.error: BaseException | None = None
+        self.finished = False
+        self.aborted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def write(self, data: bytes):
+        while not self.aborted:
+            try:
+                self.chunks.put(data, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, error: BaseException | None = None):
+        """Mark the end of the download after the last write, readers raise error if it failed"""
+        self.error = error
+        self.finished = True
+
+    def readinto(self, target) -> int:
+        while not self.buffer:
+            if self.error is not None:
+                raise Exception(f"Archive download failed: {str(self.error)}")
+            try:
+                self.buffer = self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                if self.aborted or (self.finished and self.chunks.empty()):
+                    return 0
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self):
+        # Unblocks a download still waiting for room in the buffer
+        self.aborted = True
+        super().close()
@@ -1,6 +1,8 @@
+import os
 import base64
+import asyncio
 import aiohttp
-from typing import Tuple, List
+from typing import AsyncIterator, Tuple, List
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
@@ -11,6 +13,8 @@ from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
 from goldenverba.components.reader.BasicReader import BasicReader
 from goldenverba.components.types import InputConfig
+from goldenverba.components.crawler import Crawler
+from goldenverba.components.cache import create_fetch_cache, hash_text
 
 try:
     from markdownify import markdownify as md
@@ -32,6 +36,11 @@ class HTMLReader(Reader):
         self.description = (
             "Downloads and ingests HTML from a URL, with optional recursive fetching."
         )
+        self.concurrency = int(os.getenv("VERBA_CRAWL_CONCURRENCY", "8"))
+        # Politeness limits per host while crawling
+        self.per_host = int(os.getenv("VERBA_CRAWL_PER_HOST", "4"))
+        self.delay = float(os.getenv("VERBA_CRAWL_DELAY", "0"))
+        self.fetch_cache = create_fetch_cache()
         self.config = {
             "URLs": InputConfig(
                 type="multi",
@@ -57,95 +66,83 @@ class HTMLReader(Reader):
                 description="Maximum depth for recursive fetching",
                 values=[],
             ),
+            "Concurrency": InputConfig(
+                type="number",
+                value=self.concurrency,
+                description="Number of pages fetched at once",
+                values=[],
+            ),
         }
 
     async def load(self, config: dict, fileConfig: FileConfig) -> list[Document]:
+        return [document async for document in self.stream(config, fileConfig)]
+
+    async def stream(
+        self, config: dict, fileConfig: FileConfig
+    ) -> AsyncIterator[Document]:
         reader = BasicReader()
         urls = config["URLs"].values
         to_markdown = config["Convert To Markdown"].value
         recursive = config["Recursive"].value
-        max_depth = int(config["Max Depth"].value)
-
-        documents = []
-        processed_urls = set()
-
-        async with aiohttp.ClientSession() as session:
-            for url in urls:
-                try:
-                    await self.process_url(
-                        url,
-                        to_markdown,
-                        recursive,
-                        max_depth,
-                        0,
-                        session,
-                        reader,
-                        fileConfig,
-                        documents,
-                        processed_urls,
-                    )
-                except Exception as e:
-                    msg.warn(f"Failed to process URL {url}: {str(e)}")
-
-        return documents
+        max_depth = int(config["Max Depth"].value) if recursive else 0
+        concurrency = (
+            int(config["Concurrency"].value)
+            if "Concurrency" in config
+            else self.concurrency
+        )
+
+        async with self.http_session() as session:
+
+            async def fetch(url: str, depth: int) -> tuple[Document, list[str]]:
+                document, _html = await self.process_url(
+                    url, to_markdown, session, reader, fileConfig
+                )
+                links = []
+                if depth < max_depth:
+                    links = await asyncio.to_thread(self.extract_links, _html, url)
+                return document, links
+
+            crawler = Crawler(
+                fetch,
+                max_depth=max_depth,
+                concurrency=concurrency,
+                per_host=self.per_host,
+                delay=self.delay,
+            )
+            async for url, document in crawler.crawl(urls):
+                yield document
 
     async def process_url(
         self,
         url: str,
         to_markdown: bool,
-        recursive: bool,
-        max_depth: int,
-        current_depth: int,
         session: aiohttp.ClientSession,
         reader: BasicReader,
         fileConfig: FileConfig,
-        documents: List[Document],
-        processed_urls: set,
-    ):
-        if url in processed_urls or current_depth > max_depth:
-            return
-
-        processed_urls.add(url)
-
-        try:
-            content, size, _html = await self.fetch_html_and_convert(
-                session, url, to_markdown
-            )
-            new_file_config = FileConfig(
-                fileID=fileConfig.fileID,
-                filename=url,
-                isURL=False,
-                overwrite=fileConfig.overwrite,
-                extension="md" if to_markdown else "html",
-                source=url,
-                content=content,
-                labels=fileConfig.labels,
-                rag_config=fileConfig.rag_config,
-                file_size=size,
-                status=fileConfig.status,
-                status_report=fileConfig.status_report,
-                metadata=fileConfig.metadata,
-            )
-            document = await reader.load(self.config, new_file_config)
-            documents.extend(document)
-
-            if recursive and current_depth < max_depth:
-                linked_urls = self.extract_links(_html, url)
-                for linked_url in linked_urls:
-                    await self.process_url(
-                        linked_url,
-                        to_markdown,
-                        recursive,
-                        max_depth,
-                        current_depth + 1,
-                        session,
-                        reader,
-                        fileConfig,
-                        documents,
-                        processed_urls,
-                    )
-        except Exception as e:
-            msg.warn(f"Failed to process URL {url}: {str(e)}")
+    ) -> tuple[Document, str]:
+        """Fetch a page and load it as a Document, returns the Document and the raw HTML"""
+        content, size, _html = await self.fetch_html_and_convert(
+            session, url, to_markdown
+        )
+        new_file_config = FileConfig(
+            fileID=fileConfig.fileID,
+            filename=url,
+            isURL=False,
+            overwrite=fileConfig.overwrite,
+            extension="md" if to_markdown else "html",
+            source=url,
+            content=content,
+            labels=fileConfig.labels,
+            rag_config=fileConfig.rag_config,
+            file_size=size,
+            status=fileConfig.status,
+            status_report=fileConfig.status_report,
+            metadata=fileConfig.metadata,
+        )
+        document = await reader.load(self.config, new_file_config)
+        # Stored with the document, re-imports of an unchanged page are skipped
+        document[0].meta["SourceHash"] = hash_text(_html)
+        return document[0], _html
 
     async def fetch_html_and_convert(
         self, session: aiohttp.ClientSession, url: str, to_markdown: bool
@@ -156,12 +153,10 @@ class HTMLReader(Reader):
         :param session: The aiohttp ClientSession to use for the request.
         :param url: The URL of the web page to fetch.
         :param to_markdown: Whether to convert the HTML to Markdown.
-        :return: A tuple containing the base64-encoded content and its size.
+        :return: A tuple containing the base64-encoded content, its size and the HTML.
         """
         try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                html_content = await response.text()
+            html_content = await self.fetch_html(session, url)
 
             if to_markdown:
                 if md is None:
@@ -178,6 +173,36 @@ class HTMLReader(Reader):
         except ImportError as e:
             raise Exception(f"Markdown conversion failed: {str(e)}")
 
+    async def fetch_html(self, session: aiohttp.ClientSession, url: str) -> str:
+        """
+        Fetches a page with a conditional request if it was fetched before.
+
+        :return: The HTML, taken from the cache if the server reports it unchanged.
+        """
+        cached = None
+        headers = {}
+        if self.fetch_cache is not None:
+            cached = await self.fetch_cache.aget(url)
+            if cached is not None:
+                if cached["etag"]:
+                    headers["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                return cached["body"].decode("utf-8")
+            response.raise_for_status()
+            html_content = await response.text()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if self.fetch_cache is not None:
+            await self.fetch_cache.aput(
+                url, html_content.encode("utf-8"), etag, last_modified
+            )
+        return html_content
+
     def extract_links(self, html_content: str, base_url: str) -> List[str]:
         """
         Extracts links from the HTML content and returns absolute URLs.
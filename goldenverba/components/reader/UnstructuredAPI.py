@@ -1,5 +1,3 @@
-import base64
-import io
 import os
 
 import requests
@@ -81,7 +79,7 @@ class UnstructuredReader(Reader):
 
         file_data = aiohttp.FormData()
         file_data.add_field("strategy", strategy)
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
+        file_bytes = fileConfig.open_content()
         file_data.add_field(
             "files",
             file_bytes,
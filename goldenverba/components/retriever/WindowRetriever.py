@@ -79,14 +79,19 @@ class WindowRetriever(Retriever):
         if len(chunks) == 0:
             return ([], "We couldn't find any chunks to the query")
 
+        # Fetch all documents of the retrieved chunks at once
+        documents_by_uuid = await weaviate_manager.get_documents_by_ids(
+            client,
+            list({str(chunk.properties["doc_uuid"]) for chunk in chunks}),
+            properties=["title", "metadata"],
+        )
+
         # Group Chunks by document and sum score
         doc_map = {}
         scores = [0]
         for chunk in chunks:
             if chunk.properties["doc_uuid"] not in doc_map:
-                document = await weaviate_manager.get_document(
-                    client, chunk.properties["doc_uuid"]
-                )
+                document = documents_by_uuid.get(str(chunk.properties["doc_uuid"]))
                 if document is None:
                     continue
                 doc_map[chunk.properties["doc_uuid"]] = {
@@ -118,8 +123,8 @@ class WindowRetriever(Retriever):
             # Create a range of values around the given value, excluding the original value
             return [i for i in range(value - window, value + window + 1) if i != value]
 
-        documents = []
-        context_documents = []
+        # Collect the window around high scoring chunks of every document
+        window_chunk_ids = {}
         for doc in doc_map:
             additional_chunk_ids = []
             for chunk in doc_map[doc]["chunks"]:
@@ -129,12 +134,25 @@ class WindowRetriever(Retriever):
                     additional_chunk_ids += generate_window_list(
                         chunk["chunk_id"], window
                     )
-            unique_chunk_ids = set(additional_chunk_ids)
+            existing_chunk_ids = set(
+                chunk["chunk_id"] for chunk in doc_map[doc]["chunks"]
+            )
+            window_chunk_ids[str(doc)] = [
+                chunk_id
+                for chunk_id in set(additional_chunk_ids)
+                if chunk_id >= 0 and chunk_id not in existing_chunk_ids
+            ]
 
-            if len(unique_chunk_ids) > 0:
-                additional_chunks = await weaviate_manager.get_chunk_by_ids(
-                    client, embedder, doc, unique_chunk_ids
-                )
+        window_chunks = await weaviate_manager.get_chunks_by_document_ids(
+            client, embedder, window_chunk_ids
+        )
+
+        documents = []
+        context_documents = []
+        for doc in doc_map:
+            additional_chunks = window_chunks.get(str(doc), [])
+
+            if len(additional_chunks) > 0:
                 existing_chunk_ids = set(
                     chunk["chunk_id"] for chunk in doc_map[doc]["chunks"]
                 )
@@ -0,0 +1,75 @@
+import os
+import importlib.util
+
+import aiohttp
+import httpx
+from wasabi import msg
+
+
+class HTTPSessionPool:
+    """
+    Shared keep-alive HTTP clients for components that talk to remote APIs.
+    Holds one aiohttp session and one httpx client so repeated requests to the same host reuse open connections instead of paying a TCP and TLS handshake each time.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 16,
+        keepalive: float = 60,
+        http2: bool = True,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        # httpx only speaks HTTP/2 when the optional h2 package is installed
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.session: aiohttp.ClientSession | None = None
+        self.client: httpx.AsyncClient | None = None
+
+    async def start(self):
+        """Create both clients inside the running event loop"""
+        self.get_session()
+        self.get_client()
+        msg.info(
+            f"HTTP session pool ready (limit {self.limit}, per host {self.limit_per_host}, HTTP/2 {self.http2})"
+        )
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None or self.client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.limit,
+                max_keepalive_connections=self.limit_per_host,
+                keepalive_expiry=self.keepalive,
+            )
+            self.client = httpx.AsyncClient(limits=limits, http2=self.http2)
+        return self.client
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        if self.client is not None and not self.client.is_closed:
+            await self.client.aclose()
+        self.session = None
+        self.client = None
+
+
+def create_http_pool() -> HTTPSessionPool:
+    """Create the shared HTTP session pool from environment variables"""
+    return HTTPSessionPool(
+        limit=int(os.getenv("VERBA_HTTP_POOL_SIZE", "100")),
+        limit_per_host=int(os.getenv("VERBA_HTTP_POOL_PER_HOST", "16")),
+        keepalive=float(os.getenv("VERBA_HTTP_KEEPALIVE", "60")),
+        http2=os.getenv("VERBA_HTTP2", "true").lower() not in ("false", "0", "no"),
+    )
@@ -16,6 +16,7 @@ from starlette.websockets import WebSocketDisconnect
 from wasabi import msg  # type: ignore[import]
 
 from goldenverba import verba_manager
+from goldenverba.components.session import create_http_pool
 
 from goldenverba.server.types import (
     ResetPayload,
@@ -54,15 +55,22 @@ else:
 
 manager = verba_manager.VerbaManager()
 
-client_manager = verba_manager.ClientManager()
+client_manager = verba_manager.ClientManager(manager)
+
+http_pool = create_http_pool()
 
 ### Lifespan
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await http_pool.start()
+    manager.attach_http_pool(http_pool)
+    await manager.embedder_manager.warmup()
     yield
     await client_manager.disconnect()
+    manager.chunker_manager.shutdown()
+    await http_pool.close()
 
 
 # FastAPI App
@@ -210,12 +218,21 @@ async def websocket_generate_stream(websocket: WebSocket):
 
             msg.good(f"Received generate stream call for {payload.query}")
 
+            # The client is only needed to look up and store cached answers
+            client = None
+            if (
+                manager.weaviate_manager.semantic_cache_enabled
+                and payload.credentials is not None
+            ):
+                client = await client_manager.connect(payload.credentials)
+
             full_text = ""
             async for chunk in manager.generate_stream_answer(
                 payload.rag_config,
                 payload.query,
                 payload.context,
                 payload.conversation,
+                client,
             ):
                 full_text += chunk["message"]
                 if chunk["finish_reason"] == "stop":
@@ -557,7 +574,7 @@ async def get_vectors(payload: GetVectorPayload):
     try:
         client = await client_manager.connect(payload.credentials)
         vector_groups = await manager.weaviate_manager.get_vectors(
-            client, payload.uuid, payload.showAll
+            client, payload.uuid, payload.showAll, payload.pageSize, payload.cursor
         )
         return JSONResponse(
             content={
@@ -730,6 +747,17 @@ async def get_meta(payload: Credentials):
         )
 
 
+# Get embedding and query cache metrics
+@app.get("/api/get_cache_stats")
+async def get_cache_stats():
+    return JSONResponse(
+        content={
+            "error": "",
+            "cache_stats": manager.embedder_manager.get_cache_stats(),
+        }
+    )
+
+
 ### Suggestions
 
 
@@ -8,6 +8,16 @@ from goldenverba.server.types import (
 )
 from wasabi import msg
 
+import base64
+import binascii
+import json
+import tempfile
+
+# Uploads larger than this are spooled to disk
+SPOOL_SIZE = 8 * 1024 * 1024
+# Characters decoded per step, a multiple of 4 so base64 blocks stay aligned
+DECODE_BLOCK_SIZE = 4 * 1024 * 1024
+
 
 class LoggerManager:
     def __init__(self, socket: WebSocket = None):
@@ -41,39 +51,197 @@ class LoggerManager:
             await self.socket.send_json(payload)
 
 
+class UploadBuffer:
+    """
+    Reassembles a FileConfig that is sent as a JSON string in ordered batches.
+    The top-level "content" value is written to a spooled temporary file as it arrives,
+    only the remaining (small) JSON is kept in memory.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.received = 0
+        self.next_order = 0
+        self.pending: dict[int, str] = {}
+        self.head: list[str] = []
+        self.raw = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode="w+")
+
+        # JSON scanner state
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.collecting = False
+        self.key_chars: list[str] = []
+        self.last_key = None
+        self.await_value = False
+        self.diverting = False
+        self.backslashes = 0
+
+    def add(self, order: int, chunk: str):
+        self.pending[order] = chunk
+        self.received += 1
+        while self.next_order in self.pending:
+            self.feed(self.pending.pop(self.next_order))
+            self.next_order += 1
+
+    def is_complete(self) -> bool:
+        return self.received >= self.total and not self.pending
+
+    def feed(self, text: str):
+        i = 0
+        while i < len(text):
+            if self.diverting:
+                i = self.feed_content(text, i)
+            else:
+                i = self.feed_json(text, i)
+
+    def feed_content(self, text: str, i: int) -> int:
+        """Write the content string to the spool up to its closing quote"""
+        search = i
+        while True:
+            end = text.find('"', search)
+            if end == -1:
+                segment = text[i:]
+                self.raw.write(segment)
+                stripped = segment.rstrip("\\")
+                trailing = len(segment) - len(stripped)
+                self.backslashes = (
+                    self.backslashes + trailing if not stripped else trailing
+                )
+                return len(text)
+
+            before = text[i:end]
+            stripped = before.rstrip("\\")
+            backslashes = len(before) - len(stripped)
+            if not stripped:
+                backslashes += self.backslashes
+
+            if backslashes % 2 == 0:
+                self.raw.write(before)
+                self.head.append('"')
+                self.diverting = False
+                self.backslashes = 0
+                return end + 1
+            search = end + 1
+
+    def feed_json(self, text: str, i: int) -> int:
+        """Scan the JSON outside the content value until it starts"""
+        while i < len(text):
+            ch = text[i]
+            i += 1
+
+            if self.in_string:
+                self.head.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.collecting:
+                        self.last_key = "".join(self.key_chars)
+                        self.collecting = False
+                    continue
+                if self.collecting:
+                    self.key_chars.append(ch)
+                continue
+
+            if self.await_value and not ch.isspace():
+                self.await_value = False
+                if ch == '"':
+                    self.head.append('"')
+                    self.diverting = True
+                    return i
+
+            self.head.append(ch)
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.collecting = True
+                    self.key_chars = []
+                    self.expect_key = False
+            elif ch in "{[":
+                self.depth += 1
+                if ch == "{" and self.depth == 1:
+                    self.expect_key = True
+            elif ch in "}]":
+                self.depth -= 1
+            elif ch == "," and self.depth == 1:
+                self.expect_key = True
+            elif ch == ":" and self.depth == 1:
+                self.await_value = self.last_key == "content"
+                self.last_key = None
+        return i
+
+    def build(self) -> FileConfig:
+        """Parse the FileConfig and attach the decoded content"""
+        fileConfig = FileConfig.model_validate_json("".join(self.head))
+        self.head = []
+        self.raw.seek(0)
+
+        if fileConfig.extension == "":
+            # Plain text content, not base64 encoded
+            fileConfig.content = json.loads('"' + self.raw.read() + '"')
+            self.raw.close()
+            return fileConfig
+
+        decoded = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode="w+b")
+        remainder = ""
+        try:
+            while True:
+                block = self.raw.read(DECODE_BLOCK_SIZE)
+                if not block:
+                    break
+                block = remainder + block
+                cut = len(block) - len(block) % 4
+                decoded.write(base64.b64decode(block[:cut]))
+                remainder = block[cut:]
+            if remainder:
+                decoded.write(base64.b64decode(remainder + "=" * (-len(remainder) % 4)))
+        except binascii.Error as e:
+            decoded.close()
+            raise Exception(f"Invalid base64 content for {fileConfig.filename}: {e}")
+        finally:
+            self.raw.close()
+
+        decoded.seek(0)
+        fileConfig.set_content_file(decoded)
+        return fileConfig
+
+    def close(self):
+        self.raw.close()
+
+
 class BatchManager:
     def __init__(self):
-        self.batches = {}
+        self.batches: dict[str, UploadBuffer] = {}
 
     def add_batch(self, payload: DataBatchPayload) -> FileConfig:
         try:
             # msg.info(f"Receiving Batch for {payload.fileID} : {payload.order} of {payload.total}")
 
             if payload.fileID not in self.batches:
-                self.batches[payload.fileID] = {
-                    "fileID": payload.fileID,
-                    "total": payload.total,
-                    "chunks": {},
-                }
+                self.batches[payload.fileID] = UploadBuffer(payload.total)
 
-            self.batches[payload.fileID]["chunks"][payload.order] = payload.chunk
+            self.batches[payload.fileID].add(payload.order, payload.chunk)
 
             fileConfig = self.check_batch(payload.fileID)
 
             if fileConfig is not None or payload.isLastChunk:
                 msg.info(f"Removing {payload.fileID} from BatchManager")
-                del self.batches[payload.fileID]
+                self.batches.pop(payload.fileID).close()
 
             return fileConfig
 
         except Exception as e:
             msg.fail(f"Failed to add batch to BatchManager: {str(e)}")
+            if payload.fileID in self.batches:
+                self.batches.pop(payload.fileID).close()
 
     def check_batch(self, fileID: str):
-        if len(self.batches[fileID]["chunks"].keys()) == self.batches[fileID]["total"]:
+        if self.batches[fileID].is_complete():
             msg.good(f"Collected all Batches of {fileID}")
-            chunks = self.batches[fileID]["chunks"]
-            data = "".join([chunks[chunk] for chunk in chunks])
-            return FileConfig.model_validate_json(data)
+            return self.batches[fileID].build()
         else:
             return None
@@ -1,6 +1,8 @@
-from typing import Literal
-from pydantic import BaseModel
+from typing import Any, BinaryIO, Literal
+from pydantic import BaseModel, PrivateAttr
 from enum import Enum
+import base64
+import io
 
 
 class Credentials(BaseModel):
@@ -31,6 +33,8 @@ class GetVectorPayload(BaseModel):
     uuid: str
     showAll: bool
     credentials: Credentials
+    pageSize: int = 2000
+    cursor: str | None = None
 
 
 class ConnectPayload(BaseModel):
@@ -149,6 +153,23 @@ class FileConfig(BaseModel):
     status: FileStatus
     metadata: str
     status_report: dict
+    # Decoded file bytes of streamed uploads, used instead of the base64 content
+    _content_file: Any = PrivateAttr(default=None)
+
+    def set_content_file(self, file: BinaryIO):
+        self._content_file = file
+
+    def open_content(self) -> BinaryIO:
+        """Return the decoded file bytes as a seekable file object"""
+        if self._content_file is not None:
+            self._content_file.seek(0)
+            return self._content_file
+        return io.BytesIO(base64.b64decode(self.content))
+
+    def close_content(self):
+        if self._content_file is not None:
+            self._content_file.close()
+            self._content_file = None
 
 
 class ImportStreamPayload(BaseModel):
@@ -231,6 +252,7 @@ class GeneratePayload(BaseModel):
     context: str
     conversation: list[ConversationItem]
     rag_config: dict[str, RAGComponentClass]
+    credentials: Credentials | None = None
 
 
 class ConfigPayload(BaseModel):
@@ -14,6 +14,9 @@ from goldenverba.server.helpers import LoggerManager
 from weaviate.client import WeaviateAsyncClient
 
 from goldenverba.components.document import Document
+from goldenverba.components.pipeline import IngestionPipeline, PipelineStage
+from goldenverba.components.session import HTTPSessionPool
+from goldenverba.components.cache import SingleFlight, hash_text
 from goldenverba.server.types import (
     FileConfig,
     FileStatus,
@@ -33,6 +36,25 @@ from goldenverba.components.managers import (
 load_dotenv()
 
 
+class IngestionJob:
+    """A single document travelling through the ingestion pipeline."""
+
+    def __init__(self, document: Document, fileConfig: FileConfig):
+        self.document = document
+        self.documents: list[Document] = [document]
+        self.fileConfig = fileConfig
+        self.start_time = 0.0
+        self.chunk_count = 0
+        # Set when an existing document is updated in place instead of replaced
+        self.existing_uuid: str | None = None
+        # Stored document with the same title, resolved for all documents of an import at once
+        self.duplicate_uuid: str | None = None
+        self.duplicate_checked = False
+        # Set when the source is unchanged and already stored with the same configuration
+        self.skipped = False
+        self.stored_chunks: list = []
+
+
 class VerbaManager:
     """Manages all Verba Components."""
 
@@ -43,11 +65,25 @@ class VerbaManager:
         self.retriever_manager = RetrieverManager()
         self.generator_manager = GeneratorManager()
         self.weaviate_manager = WeaviateManager()
+        # Concurrent identical retrievals and generations share one call
+        self.single_flight = SingleFlight()
         self.rag_config_uuid = "e0adcc12-9bad-4588-8a1e-bab0af6ed485"
         self.theme_config_uuid = "baab38a7-cb51-4108-acd8-6edeca222820"
         self.user_config_uuid = "f53f7738-08be-4d5a-b003-13eb4bf03ac7"
         self.environment_variables = {}
         self.installed_libraries = {}
+        self.incremental_overwrite = os.getenv(
+            "VERBA_INCREMENTAL_OVERWRITE", "true"
+        ).lower() not in ("false", "0", "no")
+        self.ingestion_queue_size = int(os.getenv("VERBA_INGESTION_QUEUE_SIZE", "8"))
+        # Streamed documents whose titles are checked for duplicates with one query
+        self.duplicate_lookup_batch_size = 64
+        self.ingestion_concurrency = {
+            "Prepare": int(os.getenv("VERBA_PREPARE_CONCURRENCY", "8")),
+            "Chunk": int(os.getenv("VERBA_CHUNK_CONCURRENCY", "4")),
+            "Embed": int(os.getenv("VERBA_EMBED_CONCURRENCY", "2")),
+            "Ingest": int(os.getenv("VERBA_INGEST_CONCURRENCY", "2")),
+        }
 
         self.verify_installed_libraries()
         self.verify_variables()
@@ -61,6 +97,7 @@ class VerbaManager:
         except Exception as e:
             raise e
         if client:
+            await self.weaviate_manager.load_collection_registry(client)
             initialized = await self.weaviate_manager.verify_collection(
                 client, self.weaviate_manager.config_collection_name
             )
@@ -106,7 +143,10 @@ class VerbaManager:
             if duplicate_uuid is not None and not fileConfig.overwrite:
                 raise Exception(f"{fileConfig.filename} already exists in Verba")
             elif duplicate_uuid is not None and fileConfig.overwrite:
-                await self.weaviate_manager.delete_document(client, duplicate_uuid)
+                # Single documents are diffed against the stored version in prepare_document
+                if fileConfig.isURL or not self.incremental_overwrite:
+                    await self.weaviate_manager.delete_document(client, duplicate_uuid)
+                    duplicate_uuid = None
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.STARTING,
@@ -121,16 +161,67 @@ class VerbaManager:
                     took=0,
                 )
 
-            documents = await self.reader_manager.load(
-                fileConfig.rag_config["Reader"].selected, fileConfig, logger
-            )
+            duplicates = {fileConfig.filename: duplicate_uuid}
 
-            tasks = [
-                self.process_single_document(client, doc, fileConfig, logger)
-                for doc in documents
-            ]
+            async def resolve_jobs(documents: list[Document]) -> list[IngestionJob]:
+                # Resolve the titles of many documents in one go instead of one lookup per document
+                duplicates.update(
+                    await self.weaviate_manager.exist_document_names(
+                        client,
+                        [
+                            document.title
+                            for document in documents
+                            if document.title not in duplicates
+                        ],
+                    )
+                )
+                jobs = []
+                for document in documents:
+                    job = IngestionJob(document, fileConfig)
+                    job.duplicate_uuid = duplicates.get(document.title)
+                    job.duplicate_checked = True
+                    jobs.append(job)
+                return jobs
+
+            async def create_jobs():
+                # Documents enter the pipeline while the reader is still loading the rest
+                batch = []
+                async for document in self.reader_manager.stream(
+                    fileConfig.rag_config["Reader"].selected, fileConfig, logger
+                ):
+                    batch.append(document)
+                    if len(batch) >= self.duplicate_lookup_batch_size:
+                        for job in await resolve_jobs(batch):
+                            yield job
+                        batch = []
+                for job in await resolve_jobs(batch):
+                    yield job
+
+            pipeline = self.create_ingestion_pipeline(client, logger)
+
+            async def report_error(job: IngestionJob, e: Exception):
+                await logger.send_report(
+                    job.fileConfig.fileID,
+                    status=FileStatus.ERROR,
+                    message=f"Import for {fileConfig.filename} failed: {str(e)}",
+                    took=round(loop.time() - job.start_time, 2),
+                )
 
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = None
+            try:
+                results = await pipeline.run(
+                    create_jobs(),
+                    on_error=report_error,
+                )
+            finally:
+                # Invalidated once per import instead of once per document, also if the reader failed midway
+                if results is None or any(
+                    not isinstance(result, Exception) and not result.skipped
+                    for result in results
+                ):
+                    await self.weaviate_manager.invalidate_semantic_cache(
+                        client, self.get_embedder_model(fileConfig)
+                    )
             successful_tasks = sum(
                 1 for result in results if not isinstance(result, Exception)
             )
@@ -143,10 +234,13 @@ class VerbaManager:
                     took=round(loop.time() - start_time, 2),
                 )
             elif successful_tasks == 1:
+                job = next(
+                    result for result in results if not isinstance(result, Exception)
+                )
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.INGESTING,
-                    message=f"Imported {fileConfig.filename} and {len(documents[0].chunks)} chunks into Weaviate",
+                    message=f"Imported {fileConfig.filename} and {job.chunk_count} chunks into Weaviate",
                     took=round(loop.time() - start_time, 2),
                 )
             elif (
@@ -178,16 +272,45 @@ class VerbaManager:
                 took=0,
             )
             return
+        finally:
+            fileConfig.close_content()
+
+    def create_ingestion_pipeline(
+        self, client, logger: LoggerManager
+    ) -> IngestionPipeline:
+        """Chain the prepare, chunk, embed and ingest steps into a bounded pipeline"""
+        return IngestionPipeline(
+            [
+                PipelineStage(
+                    "Prepare",
+                    lambda job: self.prepare_document(client, job, logger),
+                    self.ingestion_concurrency["Prepare"],
+                ),
+                PipelineStage(
+                    "Chunk",
+                    lambda job: self.chunk_document(job, logger),
+                    self.ingestion_concurrency["Chunk"],
+                ),
+                PipelineStage(
+                    "Embed",
+                    lambda job: self.embed_document(client, job, logger),
+                    self.ingestion_concurrency["Embed"],
+                ),
+                PipelineStage(
+                    "Ingest",
+                    lambda job: self.ingest_document(client, job, logger),
+                    self.ingestion_concurrency["Ingest"],
+                ),
+            ],
+            queue_size=self.ingestion_queue_size,
+        )
 
-    async def process_single_document(
-        self,
-        client,
-        document: Document,
-        fileConfig: FileConfig,
-        logger: LoggerManager,
-    ):
-        loop = asyncio.get_running_loop()
-        start_time = loop.time()
+    async def prepare_document(
+        self, client, job: IngestionJob, logger: LoggerManager
+    ) -> IngestionJob:
+        fileConfig = job.fileConfig
+        document = job.document
+        job.start_time = asyncio.get_running_loop().time()
 
         if fileConfig.isURL:
             currentFileConfig = deepcopy(fileConfig)
@@ -199,73 +322,219 @@ class VerbaManager:
                 document.title,
                 fileConfig.fileID,
             )
-        else:
-            currentFileConfig = fileConfig
+            job.fileConfig = currentFileConfig
 
-        try:
+        if job.duplicate_checked:
+            duplicate_uuid = job.duplicate_uuid
+        else:
             duplicate_uuid = await self.weaviate_manager.exist_document_name(
                 client, document.title
             )
-            if duplicate_uuid is not None and not currentFileConfig.overwrite:
-                raise Exception(f"{document.title} already exists in Verba")
-            elif duplicate_uuid is not None and currentFileConfig.overwrite:
+        if (
+            duplicate_uuid is not None
+            and document.meta.get("SourceHash") is not None
+            and await self.is_stored_unchanged(client, duplicate_uuid, job)
+        ):
+            job.skipped = True
+        elif duplicate_uuid is not None and not job.fileConfig.overwrite:
+            raise Exception(f"{document.title} already exists in Verba")
+        elif duplicate_uuid is not None and job.fileConfig.overwrite:
+            if await self.can_update_incrementally(client, duplicate_uuid, job):
+                job.existing_uuid = duplicate_uuid
+            else:
                 await self.weaviate_manager.delete_document(client, duplicate_uuid)
 
-            chunk_task = asyncio.create_task(
-                self.chunker_manager.chunk(
-                    currentFileConfig.rag_config["Chunker"].selected,
-                    currentFileConfig,
-                    [document],
-                    self.embedder_manager.embedders[
-                        currentFileConfig.rag_config["Embedder"].selected
-                    ],
-                    logger,
-                )
-            )
-            chunked_documents = await chunk_task
-
-            embedding_task = asyncio.create_task(
-                self.embedder_manager.vectorize(
-                    currentFileConfig.rag_config["Embedder"].selected,
-                    currentFileConfig,
-                    chunked_documents,
-                    logger,
-                )
+        return job
+
+    async def can_update_incrementally(
+        self, client, uuid: str, job: IngestionJob
+    ) -> bool:
+        """Stored vectors can only be reused if the document was embedded with the same vector settings and metadata"""
+        if not self.incremental_overwrite:
+            return False
+        stored_document = await self.weaviate_manager.get_document(
+            client, uuid, properties=["meta", "metadata"]
+        )
+        if stored_document is None:
+            return False
+        rag_config = job.fileConfig.rag_config
+        embedder = rag_config["Embedder"].selected
+        config = rag_config["Embedder"].components[embedder].config
+        try:
+            stored_embedder = json.loads(stored_document["meta"])["Embedder"]
+            # Every setting that changes the vectors, as in EmbeddingManager.get_cache_model
+            same_vectors = stored_embedder["name"] == embedder and all(
+                stored_embedder["config"][setting]["value"] == config[setting].value
+                for setting in self.embedder_manager.embedders[embedder].vector_settings
+                if setting in config
             )
-            vectorized_documents = await embedding_task
+        except Exception:
+            return False
+        return (
+            same_vectors
+            and stored_document.get("metadata", "") == job.document.metadata
+        )
 
-            for document in vectorized_documents:
-                ingesting_task = asyncio.create_task(
-                    self.weaviate_manager.import_document(
-                        client,
-                        document,
-                        currentFileConfig.rag_config["Embedder"]
-                        .components[fileConfig.rag_config["Embedder"].selected]
-                        .config["Model"]
-                        .value,
-                    )
-                )
-                await ingesting_task
+    async def is_stored_unchanged(self, client, uuid: str, job: IngestionJob) -> bool:
+        """A document can be skipped if it was stored from the same source content with the same labels, metadata, reader, chunker and embedder"""
+        stored_document = await self.weaviate_manager.get_document(
+            client, uuid, properties=["meta", "metadata", "labels"]
+        )
+        if stored_document is None:
+            return False
+        try:
+            stored_meta = json.loads(stored_document["meta"])
+        except Exception:
+            return False
+        rag_config = job.fileConfig.rag_config
+        return (
+            stored_meta.get("SourceHash") == job.document.meta.get("SourceHash")
+            and stored_meta.get("Reader") == job.document.meta.get("Reader")
+            and stored_meta.get("Chunker")
+            == rag_config["Chunker"]
+            .components[rag_config["Chunker"].selected]
+            .model_dump()
+            and stored_meta.get("Embedder")
+            == rag_config["Embedder"]
+            .components[rag_config["Embedder"].selected]
+            .model_dump()
+            and stored_document.get("metadata", "") == job.document.metadata
+            and sorted(stored_document.get("labels") or [])
+            == sorted(job.document.labels)
+        )
 
-            await logger.send_report(
-                currentFileConfig.fileID,
-                status=FileStatus.INGESTING,
-                message=f"Imported {currentFileConfig.filename} into Weaviate",
-                took=round(loop.time() - start_time, 2),
+    def get_embedder_model(self, fileConfig: FileConfig) -> str:
+        return (
+            fileConfig.rag_config["Embedder"]
+            .components[fileConfig.rag_config["Embedder"].selected]
+            .config["Model"]
+            .value
+        )
+
+    async def chunk_document(
+        self, job: IngestionJob, logger: LoggerManager
+    ) -> IngestionJob:
+        if job.skipped:
+            return job
+        job.documents = await self.chunker_manager.chunk(
+            job.fileConfig.rag_config["Chunker"].selected,
+            job.fileConfig,
+            [job.document],
+            self.embedder_manager.embedders[
+                job.fileConfig.rag_config["Embedder"].selected
+            ],
+            logger,
+        )
+        return job
+
+    async def embed_document(
+        self, client, job: IngestionJob, logger: LoggerManager
+    ) -> IngestionJob:
+        if job.skipped:
+            return job
+        if job.existing_uuid is not None:
+            job.stored_chunks = await self.weaviate_manager.get_document_chunks(
+                client,
+                self.get_embedder_model(job.fileConfig),
+                job.existing_uuid,
+                include_vector=True,
             )
+            stored_vectors = {}
+            for obj in job.stored_chunks:
+                stored_vectors.setdefault(obj.properties["content"], []).append(
+                    obj.vector["default"]
+                )
+            for document in job.documents:
+                for chunk in document.chunks:
+                    if stored_vectors.get(chunk.content):
+                        chunk.vector = stored_vectors[chunk.content].pop(0)
+
+        job.documents = await self.embedder_manager.vectorize(
+            job.fileConfig.rag_config["Embedder"].selected,
+            job.fileConfig,
+            job.documents,
+            logger,
+        )
+        await self.weaviate_manager.project_chunks(
+            client, self.get_embedder_model(job.fileConfig), job.documents
+        )
+        return job
+
+    async def ingest_document(
+        self, client, job: IngestionJob, logger: LoggerManager
+    ) -> IngestionJob:
+        loop = asyncio.get_running_loop()
+        currentFileConfig = job.fileConfig
+        embedder_model = self.get_embedder_model(currentFileConfig)
 
+        if job.skipped:
             await logger.send_report(
                 currentFileConfig.fileID,
                 status=FileStatus.DONE,
-                message=f"Import for {currentFileConfig.filename} completed successfully",
-                took=round(loop.time() - start_time, 2),
+                message=f"Skipped {currentFileConfig.filename}, unchanged since the last import",
+                took=round(loop.time() - job.start_time, 2),
             )
+            return job
+
+        for document in job.documents:
+            if job.existing_uuid is not None:
+                await self.weaviate_manager.update_document(
+                    client,
+                    job.existing_uuid,
+                    document,
+                    embedder_model,
+                    job.stored_chunks,
+                )
+                job.stored_chunks = []
+            else:
+                await self.weaviate_manager.import_document(
+                    client, document, embedder_model
+                )
+            job.chunk_count += len(document.chunks)
+            # Release chunks and vectors once they are stored in Weaviate
+            document.chunks = []
+
+        await logger.send_report(
+            currentFileConfig.fileID,
+            status=FileStatus.INGESTING,
+            message=f"Imported {currentFileConfig.filename} into Weaviate",
+            took=round(loop.time() - job.start_time, 2),
+        )
+
+        await logger.send_report(
+            currentFileConfig.fileID,
+            status=FileStatus.DONE,
+            message=f"Import for {currentFileConfig.filename} completed successfully",
+            took=round(loop.time() - job.start_time, 2),
+        )
+        return job
+
+    async def process_single_document(
+        self,
+        client,
+        document: Document,
+        fileConfig: FileConfig,
+        logger: LoggerManager,
+    ):
+        loop = asyncio.get_running_loop()
+        job = IngestionJob(document, fileConfig)
+
+        try:
+            await self.prepare_document(client, job, logger)
+            await self.chunk_document(job, logger)
+            await self.embed_document(client, job, logger)
+            await self.ingest_document(client, job, logger)
+            if not job.skipped:
+                await self.weaviate_manager.invalidate_semantic_cache(
+                    client, self.get_embedder_model(job.fileConfig)
+                )
+            return job
         except Exception as e:
             await logger.send_report(
-                currentFileConfig.fileID,
+                job.fileConfig.fileID,
                 status=FileStatus.ERROR,
                 message=f"Import for {fileConfig.filename} failed: {str(e)}",
-                took=round(loop.time() - start_time, 2),
+                took=round(loop.time() - job.start_time, 2),
             )
             raise Exception(f"Import for {fileConfig.filename} failed: {str(e)}")
 
@@ -471,6 +740,18 @@ class VerbaManager:
         msg.info("Resetting User Configuration")
         await self.weaviate_manager.reset_config(client, self.user_config_uuid)
 
+    # HTTP Sessions
+
+    def attach_http_pool(self, http_pool: HTTPSessionPool) -> None:
+        """Share one pool of keep-alive HTTP clients across all Readers, Embedders and Generators"""
+        components = [
+            *self.reader_manager.readers.values(),
+            *self.embedder_manager.embedders.values(),
+            *self.generator_manager.generators.values(),
+        ]
+        for component in components:
+            component.http_pool = http_pool
+
     # Environment and Libraries
 
     def verify_installed_libraries(self) -> None:
@@ -710,14 +991,59 @@ class VerbaManager:
         document_uuids: list[str] = [],
     ):
 
+        await self.weaviate_manager.add_suggestion(client, query)
+
+        key = self.get_request_key(
+            client,
+            query,
+            {
+                "Retriever": rag_config["Retriever"].model_dump(),
+                "Embedder": rag_config["Embedder"].model_dump(),
+                "labels": sorted(labels),
+                "documents": sorted(document_uuids),
+            },
+        )
+        return await self.single_flight.do(
+            key,
+            lambda: self.run_retrieval(
+                client, query, rag_config, labels, document_uuids
+            ),
+        )
+
+    async def run_retrieval(
+        self,
+        client,
+        query: str,
+        rag_config: dict,
+        labels: list[str],
+        document_uuids: list[str],
+    ):
+
         retriever = rag_config["Retriever"].selected
         embedder = rag_config["Embedder"].selected
 
-        await self.weaviate_manager.add_suggestion(client, query)
-
         vector = await self.embedder_manager.vectorize_query(
             embedder, query, rag_config
         )
+
+        embedder_model = self.get_rag_embedder_model(rag_config)
+        cache_key = hash_text(
+            json.dumps(
+                {
+                    "Retriever": rag_config["Retriever"].model_dump(),
+                    "Embedder": rag_config["Embedder"].model_dump(),
+                    "labels": sorted(labels),
+                    "documents": sorted(document_uuids),
+                },
+                sort_keys=True,
+            )
+        )
+        cached = await self.weaviate_manager.get_semantic_cache(
+            client, embedder_model, "retrieval", cache_key, vector
+        )
+        if cached is not None:
+            return (json.loads(cached["documents"]), cached["context"])
+
         documents, context = await self.retriever_manager.retrieve(
             client,
             retriever,
@@ -729,28 +1055,126 @@ class VerbaManager:
             document_uuids,
         )
 
+        await self.weaviate_manager.add_semantic_cache(
+            client,
+            embedder_model,
+            "retrieval",
+            cache_key,
+            query,
+            vector,
+            {"documents": json.dumps(documents), "context": context},
+        )
+
         return (documents, context)
 
+    def get_request_key(self, client, query: str, config: dict) -> str:
+        """Identify a request by its Weaviate client, query and everything else its result depends on"""
+        return hash_text(
+            json.dumps(
+                {"client": id(client), "query": query, "config": config},
+                sort_keys=True,
+            )
+        )
+
+    def get_rag_embedder_model(self, rag_config: dict) -> str:
+        return (
+            rag_config["Embedder"]
+            .components[rag_config["Embedder"].selected]
+            .config["Model"]
+            .value
+        )
+
     async def generate_stream_answer(
         self,
         rag_config: dict,
         query: str,
         context: str,
         conversation: list[dict],
+        client=None,
+    ):
+        key = self.get_request_key(
+            client,
+            query,
+            {
+                "Generator": rag_config["Generator"].model_dump(),
+                "Embedder": rag_config["Embedder"].model_dump(),
+                "context": hash_text(context),
+                "conversation": [
+                    item.model_dump() if hasattr(item, "model_dump") else item
+                    for item in conversation
+                ],
+            },
+        )
+        async for result in self.single_flight.stream(
+            key,
+            lambda: self.run_generation(
+                rag_config, query, context, conversation, client
+            ),
+        ):
+            yield result
+
+    async def run_generation(
+        self,
+        rag_config: dict,
+        query: str,
+        context: str,
+        conversation: list[dict],
+        client=None,
     ):
+        # Answers only depend on query and context without a prior conversation
+        use_cache = (
+            client is not None
+            and len(conversation) == 0
+            and self.weaviate_manager.semantic_cache_enabled
+        )
+
+        if use_cache:
+            embedder_model = self.get_rag_embedder_model(rag_config)
+            vector = await self.embedder_manager.vectorize_query(
+                rag_config["Embedder"].selected, query, rag_config
+            )
+            cache_key = hash_text(
+                json.dumps(
+                    {
+                        "Generator": rag_config["Generator"].model_dump(),
+                        "context": hash_text(context),
+                    },
+                    sort_keys=True,
+                )
+            )
+            cached = await self.weaviate_manager.get_semantic_cache(
+                client, embedder_model, "answer", cache_key, vector
+            )
+            if cached is not None:
+                yield {"message": cached["answer"], "finish_reason": "stop"}
+                return
 
         full_text = ""
+        streamed = 0
         async for result in self.generator_manager.generate_stream(
             rag_config, query, context, conversation
         ):
             full_text += result["message"]
+            streamed += 1
             yield result
 
+        # Generators report errors as a single message, only cache streamed answers
+        if use_cache and streamed > 1 and full_text:
+            await self.weaviate_manager.add_semantic_cache(
+                client,
+                embedder_model,
+                "answer",
+                cache_key,
+                query,
+                vector,
+                {"answer": full_text},
+            )
+
 
 class ClientManager:
-    def __init__(self) -> None:
+    def __init__(self, manager: VerbaManager | None = None) -> None:
         self.clients: dict[str, dict] = {}
-        self.manager: VerbaManager = VerbaManager()
+        self.manager: VerbaManager = manager if manager else VerbaManager()
         self.max_time: int = 5
 
     def hash_credentials(self, credentials: Credentials) -> str:
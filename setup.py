@@ -53,5 +53,9 @@ setup(
         "huggingface": [
             "sentence-transformers==3.0.1",
         ],
+        "onnx": [
+            "onnxruntime==1.18.1",
+            "optimum[onnxruntime]==1.21.2",
+        ],
     },
 )